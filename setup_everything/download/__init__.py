@@ -1,3 +1,40 @@
 from .download import Downloader
+from .async_download import AsyncDownloader
+from .cache import ReleaseCache
+from .index import ReleaseIndex
+from .store import ArtifactStore
+from .http_client import HttpClient, get_http_client
+from .async_http_client import AsyncHttpClient
+from .retry import RetryPolicy
+from .errors import (
+    DownloadError,
+    ManifestError,
+    ReleaseNotFoundError,
+    AssetNotFoundError,
+    ChecksumMismatchError,
+    DigestMismatchError,
+    HttpStatusError,
+    NetworkError,
+    DownloadTimeoutError,
+)
 
-__all__ = ["Downloader"]
+__all__ = [
+    "Downloader",
+    "AsyncDownloader",
+    "ReleaseCache",
+    "ReleaseIndex",
+    "ArtifactStore",
+    "HttpClient",
+    "get_http_client",
+    "AsyncHttpClient",
+    "RetryPolicy",
+    "DownloadError",
+    "ManifestError",
+    "ReleaseNotFoundError",
+    "AssetNotFoundError",
+    "ChecksumMismatchError",
+    "DigestMismatchError",
+    "HttpStatusError",
+    "NetworkError",
+    "DownloadTimeoutError",
+]
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from http import HTTPStatus
+from typing import Optional, Dict, Any, IO
+from urllib.error import URLError, HTTPError
+
+from .async_http_client import AsyncHttpClient, AsyncHttpResponse
+from .base import (
+    BaseDownloader,
+    get_download_error,
+    get_release_error,
+    get_asset_error,
+)
+from .cache import ReleaseCache
+from .download import Downloader, CHUNK_SIZE
+from .index import ReleaseIndex, MAX_PAGES
+from .errors import ManifestError, AssetNotFoundError, ChecksumMismatchError
+from .retry import RetryPolicy, RetryState
+from .store import ArtifactStore
+from ..utils import log_notice, get_manifest_schema_error, Metrics
+
+
+def read_manifest(manifest_path: str) -> Dict[str, Any]:
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise ManifestError(f"Manifest file not found: {manifest_path}")
+    except json.JSONDecodeError as e:
+        raise ManifestError(f"Invalid JSON in manifest file: {e}")
+
+    error = get_manifest_schema_error(manifest)
+    if error:
+        raise ManifestError(error)
+
+    return manifest
+
+
+def open_part_file(part_file: str, offset: int) -> IO[bytes]:
+    out_file = open(part_file, "r+b" if offset else "wb")
+    out_file.seek(offset)
+    out_file.truncate()
+    return out_file
+
+
+def write_chunk(out_file: IO[bytes], sha256_hash, chunk: bytes) -> None:
+    sha256_hash.update(chunk)
+    out_file.write(chunk)
+
+
+class AsyncDownloader(BaseDownloader):
+    def __init__(
+        self,
+        github_token: Optional[str] = None,
+        direct_download: Optional[bool] = None,
+        release_cache: Optional[ReleaseCache] = None,
+        artifact_store: Optional[ArtifactStore] = None,
+        http_client: Optional[AsyncHttpClient] = None,
+        metrics: Optional[Metrics] = None,
+        mirror_url: Optional[str] = None,
+        release_index: Optional[ReleaseIndex] = None,
+    ):
+        super().__init__(
+            github_token,
+            direct_download,
+            release_cache,
+            artifact_store,
+            metrics,
+            mirror_url,
+            release_index,
+        )
+        self.owns_http_client = http_client is None
+        self.http_client = http_client or AsyncHttpClient(
+            retry_policy=RetryPolicy.from_env()
+        )
+
+    @classmethod
+    def from_env(
+        cls,
+        github_token: Optional[str] = None,
+        direct_download: Optional[bool] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> "AsyncDownloader":
+        return cls(
+            github_token,
+            direct_download,
+            ReleaseCache.from_env(),
+            ArtifactStore.from_env(),
+            metrics=metrics,
+            mirror_url=os.getenv("SETUP_EVERYTHING_MIRROR") or None,
+            release_index=ReleaseIndex.from_env(),
+        )
+
+    async def open_url(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        timeout: Optional[float] = None,
+        retry: Optional[RetryState] = None,
+    ) -> AsyncHttpResponse:
+        start = time.perf_counter()
+        response = await self.http_client.request(
+            url, headers, timeout=timeout, retry=retry
+        )
+
+        self.metrics.add_time(
+            "request", time.perf_counter() - start - response.redirect_seconds
+        )
+        if response.redirects:
+            self.metrics.add_time("redirect", response.redirect_seconds)
+
+        self.metrics.count("requests")
+        self.metrics.count("redirects", response.redirects)
+        return response
+
+    async def fetch_release_data(
+        self, repo: str, release: str, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        start = time.perf_counter()
+
+        try:
+            return await self.fetch_release_data_once(repo, release, timeout)
+        finally:
+            self.metrics.add_time("api", time.perf_counter() - start)
+
+    async def get_index_entry(
+        self, repo: str, timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        start = time.perf_counter()
+
+        try:
+            entry = await asyncio.to_thread(self.release_index.load, repo)
+            if entry and self.release_index.is_fresh(entry):
+                return entry
+
+            return await self.fetch_release_index(repo, timeout)
+        finally:
+            self.metrics.add_time("api", time.perf_counter() - start)
+
+    async def fetch_release_index(
+        self, repo: str, timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        url = self.get_index_url(repo)
+        headers = self.get_release_headers()
+
+        releases = {}
+        try:
+            for _ in range(MAX_PAGES):
+                async with await self.http_client.request(
+                    url, headers, timeout=timeout
+                ) as response:
+                    ReleaseIndex.add_page(releases, await response.read())
+                    url = ReleaseIndex.get_next_url(response.headers.get("Link"))
+
+                self.metrics.count("requests")
+                if not url:
+                    break
+        except (URLError, OSError, ValueError, KeyError) as e:
+            log_notice(
+                f"Could not index releases of {repo}, looking them up one by one: {e}"
+            )
+            return None
+
+        return await asyncio.to_thread(self.release_index.store, repo, releases)
+
+    async def fetch_release_data_once(
+        self, repo: str, release: str, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        cached = None
+        if self.release_cache:
+            cached = await asyncio.to_thread(self.release_cache.load, repo, release)
+
+        if cached and self.release_cache.is_fresh(cached):
+            return cached["data"]
+
+        try:
+            async with await self.http_client.request(
+                self.get_release_url(repo, release),
+                self.get_release_headers(cached),
+                timeout=timeout,
+            ) as response:
+                release_data = json.loads((await response.read()).decode())
+        except HTTPError as e:
+            if e.code == HTTPStatus.NOT_MODIFIED and cached:
+                etag = e.headers.get("ETag") or cached.get("etag")
+                last_modified = e.headers.get("Last-Modified") or cached.get(
+                    "last_modified"
+                )
+                release_data = cached["data"]
+            else:
+                raise get_release_error(e, repo, release) from e
+        except URLError as e:
+            raise get_release_error(e, repo, release) from e
+        except (OSError, ValueError) as e:
+            raise get_download_error(URLError(e)) from e
+        else:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        if self.release_cache:
+            await asyncio.to_thread(
+                self.release_cache.store,
+                repo,
+                release,
+                release_data,
+                etag,
+                last_modified,
+            )
+
+        return release_data
+
+    async def find_release_asset(
+        self, repo: str, release: str, filename: str, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        release_data = await self.fetch_release_data(repo, release, timeout)
+        asset = self.get_asset(release_data, filename)
+        if not asset:
+            raise AssetNotFoundError(filename)
+
+        return asset
+
+    async def get_release(
+        self,
+        arch: str,
+        os_name: str,
+        version: str,
+        output_file: str,
+        expected_sha256: str,
+        manifest: str,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        manifest_data = await asyncio.to_thread(read_manifest, manifest)
+
+        repo, release, filename = self.get_release_asset(
+            manifest_data, arch, os_name, version
+        )
+
+        return await self.find_release_asset(repo, release, filename, timeout)
+
+    async def download_stream(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        part_file: str,
+        timeout: Optional[float] = None,
+    ) -> str:
+        sha256_hash = hashlib.sha256()
+        offset = 0
+
+        if await asyncio.to_thread(os.path.exists, part_file):
+            offset = await asyncio.to_thread(
+                Downloader.update_hash_from_file, sha256_hash, part_file
+            )
+            log_notice(f"Resuming download of {part_file} from {offset} bytes.")
+
+        retry = self.http_client.retry_policy.begin(f"Download of {url}")
+        while True:
+            request_headers = dict(headers)
+            if offset:
+                request_headers["Range"] = f"bytes={offset}-"
+
+            try:
+                async with await self.open_url(
+                    url, request_headers, timeout, retry
+                ) as response:
+                    if offset and response.status != HTTPStatus.PARTIAL_CONTENT:
+                        sha256_hash = hashlib.sha256()
+                        offset = 0
+
+                    start = time.perf_counter()
+                    out_file = await asyncio.to_thread(
+                        open_part_file, part_file, offset
+                    )
+                    try:
+                        while chunk := await response.read(CHUNK_SIZE):
+                            await asyncio.to_thread(
+                                write_chunk, out_file, sha256_hash, chunk
+                            )
+                            offset += len(chunk)
+                            self.metrics.count("downloaded_bytes", len(chunk))
+                    finally:
+                        await asyncio.to_thread(out_file.close)
+
+                    self.metrics.add_time("transfer", time.perf_counter() - start)
+
+                return sha256_hash.hexdigest()
+            except HTTPError as e:
+                if e.code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE and offset:
+                    return sha256_hash.hexdigest()
+
+                raise
+            except URLError:
+                raise
+            except (OSError, ValueError) as e:
+                log_notice(f"Download interrupted at {offset} bytes.")
+                delay = retry.next_delay(e)
+                if delay is None:
+                    raise URLError(e)
+
+                await asyncio.sleep(delay)
+
+    async def download_asset(
+        self,
+        asset_url: str,
+        output_file: str,
+        expected_sha256: str,
+        missing_ok: bool = False,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        headers = self.get_auth_headers()
+
+        part_file = f"{output_file}.part"
+        resumed = await asyncio.to_thread(os.path.exists, part_file)
+
+        try:
+            calculated_sha256 = await self.download_stream(
+                asset_url, headers, part_file, timeout
+            )
+
+            if resumed and calculated_sha256 != expected_sha256:
+                log_notice(
+                    f"Resumed download of {output_file} does not match the expected checksum. Downloading it again."
+                )
+                await asyncio.to_thread(os.remove, part_file)
+                calculated_sha256 = await self.download_stream(
+                    asset_url, headers, part_file, timeout
+                )
+        except HTTPError as e:
+            if missing_ok and e.code == HTTPStatus.NOT_FOUND:
+                return False
+
+            raise get_asset_error(e, asset_url) from e
+        except URLError as e:
+            raise get_asset_error(e, asset_url) from e
+
+        if calculated_sha256 != expected_sha256:
+            await asyncio.to_thread(os.remove, part_file)
+            raise ChecksumMismatchError(expected_sha256, calculated_sha256)
+
+        await asyncio.to_thread(os.replace, part_file, output_file)
+        return True
+
+    async def verify_checksum(self, file_path: str, expected_sha256: str) -> None:
+        start = time.perf_counter()
+        calculated_sha256 = await asyncio.to_thread(Downloader.get_checksum, file_path)
+        self.metrics.add_time("hash", time.perf_counter() - start)
+
+        if calculated_sha256 != expected_sha256:
+            await asyncio.to_thread(os.remove, file_path)
+            raise ChecksumMismatchError(expected_sha256, calculated_sha256)
+
+    async def download_release_asset(
+        self,
+        arch: str,
+        os_name: str,
+        version: str,
+        output_file: str,
+        expected_sha256: str,
+        manifest: str,
+        timeout: Optional[float] = None,
+    ) -> str:
+        return await self.download_manifest_asset(
+            await asyncio.to_thread(read_manifest, manifest),
+            arch,
+            os_name,
+            version,
+            output_file,
+            expected_sha256,
+            timeout,
+        )
+
+    async def download_manifest_asset(
+        self,
+        manifest_data: Dict[str, Any],
+        arch: str,
+        os_name: str,
+        version: str,
+        output_file: str,
+        expected_sha256: str,
+        timeout: Optional[float] = None,
+    ) -> str:
+        repo, release, filename = self.get_release_asset(
+            manifest_data, arch, os_name, version
+        )
+
+        if await asyncio.to_thread(os.path.exists, output_file):
+            try:
+                await self.verify_checksum(output_file, expected_sha256)
+                return filename
+            except ChecksumMismatchError:
+                log_notice(
+                    f"File {output_file} does not match the expected checksum. Downloading it again."
+                )
+
+        if self.artifact_store:
+            stored = await asyncio.to_thread(
+                self.artifact_store.fetch, expected_sha256, output_file
+            )
+            if stored:
+                try:
+                    await self.verify_checksum(output_file, expected_sha256)
+                    return filename
+                except ChecksumMismatchError:
+                    log_notice(
+                        f"Stored copy of {filename} does not match the expected checksum. Downloading it again."
+                    )
+                    await asyncio.to_thread(self.artifact_store.remove, expected_sha256)
+
+        downloaded = False
+        if self.use_release_index():
+            asset = self.get_indexed_asset(
+                await self.get_index_entry(repo, timeout),
+                repo,
+                release,
+                filename,
+                expected_sha256,
+            )
+            if asset:
+                downloaded = await self.download_asset(
+                    asset["browser_download_url"],
+                    output_file,
+                    expected_sha256,
+                    timeout=timeout,
+                )
+
+        if not downloaded and self.use_direct_download(manifest_data):
+            asset = self.get_direct_asset(repo, release, filename)
+            downloaded = await self.download_asset(
+                asset["browser_download_url"],
+                output_file,
+                expected_sha256,
+                missing_ok=True,
+                timeout=timeout,
+            )
+            if not downloaded:
+                log_notice(
+                    f"Asset {filename} not found at its release download URL. "
+                    "Falling back to the releases API."
+                )
+
+        if not downloaded:
+            asset = self.get_verified_asset(
+                await self.fetch_release_data(repo, release, timeout),
+                filename,
+                expected_sha256,
+            )
+            await self.download_asset(
+                asset["browser_download_url"],
+                output_file,
+                expected_sha256,
+                timeout=timeout,
+            )
+
+        if self.artifact_store:
+            await asyncio.to_thread(
+                self.artifact_store.add, expected_sha256, output_file
+            )
+
+        return filename
+
+    async def close(self) -> None:
+        if self.owns_http_client:
+            await self.http_client.close()
+
+    async def __aenter__(self) -> "AsyncDownloader":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
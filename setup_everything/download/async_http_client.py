@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+
+import asyncio
+import http.client
+import io
+import ssl
+import time
+from http import HTTPStatus
+from typing import Optional, Dict, List, Tuple
+from urllib.error import URLError, HTTPError
+from urllib.parse import urlsplit, urljoin
+
+from .http_client import (
+    DEFAULT_TIMEOUT,
+    MAX_REDIRECTS,
+    USER_AGENT,
+    REDIRECT_STATUSES,
+    ConnectionKey,
+    HttpClient,
+)
+from .retry import RetryPolicy, RetryState
+
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+ResponseHead = Tuple[int, str, http.client.HTTPMessage]
+
+
+class AsyncHttpResponse:
+    def __init__(
+        self,
+        client: "AsyncHttpClient",
+        key: ConnectionKey,
+        connection: Connection,
+        head: ResponseHead,
+        url: str,
+        timeout: float,
+    ):
+        self.client = client
+        self.key = key
+        self.connection = connection
+        self.status, self.reason, self.headers = head
+        self.url = url
+        self.timeout = timeout
+        self.redirects = 0
+        self.redirect_seconds = 0.0
+
+        self.chunked = "chunked" in self.headers.get("Transfer-Encoding", "").lower()
+        self.will_close = self.headers.get("Connection", "").lower() == "close"
+        self.chunk_remaining = 0
+
+        content_length = self.headers.get("Content-Length")
+        self.remaining = None
+        if self.status in (HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED):
+            self.remaining = 0
+        elif content_length and not self.chunked:
+            self.remaining = int(content_length)
+
+        if self.remaining is None and not self.chunked:
+            self.will_close = True
+
+        self.done = self.remaining == 0
+
+    async def read(self, amt: Optional[int] = None) -> bytes:
+        if amt is None:
+            chunks = []
+            while chunk := await self.read(io.DEFAULT_BUFFER_SIZE * 16):
+                chunks.append(chunk)
+            return b"".join(chunks)
+
+        if self.done or amt <= 0:
+            return b""
+
+        async with asyncio.timeout(self.timeout):
+            if self.chunked:
+                return await self.read_chunked(amt)
+
+            return await self.read_body(amt)
+
+    async def read_body(self, amt: int) -> bytes:
+        reader = self.connection[0]
+
+        if self.remaining is None:
+            data = await reader.read(amt)
+            if not data:
+                self.done = True
+            return data
+
+        data = await reader.read(min(amt, self.remaining))
+        if not data:
+            raise ConnectionResetError(
+                f"Connection closed with {self.remaining} bytes remaining"
+            )
+
+        self.remaining -= len(data)
+        self.done = self.remaining == 0
+        return data
+
+    async def read_chunked(self, amt: int) -> bytes:
+        reader = self.connection[0]
+
+        if not self.chunk_remaining:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionResetError("Connection closed in chunked response")
+
+            self.chunk_remaining = int(line.split(b";", 1)[0].strip(), 16)
+            if not self.chunk_remaining:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                self.done = True
+                return b""
+
+        data = await reader.read(min(amt, self.chunk_remaining))
+        if not data:
+            raise ConnectionResetError("Connection closed in chunked response")
+
+        self.chunk_remaining -= len(data)
+        if not self.chunk_remaining:
+            await reader.readline()
+        return data
+
+    async def close(self) -> None:
+        if self.connection is None:
+            return
+
+        if self.done and not self.will_close:
+            self.client.release_connection(self.key, self.connection)
+        else:
+            self.connection[1].close()
+
+        self.connection = None
+
+    async def __aenter__(self) -> "AsyncHttpResponse":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+
+class AsyncHttpClient:
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        retry_policy: Optional[RetryPolicy] = None,
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ):
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.idle_connections: Dict[ConnectionKey, List[Connection]] = {}
+
+    @staticmethod
+    async def read_head(reader: asyncio.StreamReader) -> ResponseHead:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionResetError("Connection closed before the response")
+
+        parts = line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+            raise http.client.BadStatusLine(line.decode("latin-1"))
+
+        headers = http.client.HTTPMessage()
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip()] = value.strip()
+
+        return int(parts[1]), parts[2] if len(parts) > 2 else "", headers
+
+    async def open_connection(self, key: ConnectionKey) -> Connection:
+        scheme, host, port, proxy = key
+        if not proxy:
+            return await asyncio.open_connection(
+                host, port, ssl=self.ssl_context if scheme == "https" else None
+            )
+
+        proxy_url = urlsplit(proxy)
+        proxy_port = proxy_url.port or (443 if proxy_url.scheme == "https" else 80)
+        reader, writer = await asyncio.open_connection(
+            proxy_url.hostname,
+            proxy_port,
+            ssl=self.ssl_context if proxy_url.scheme == "https" else None,
+        )
+        if scheme != "https":
+            return reader, writer
+
+        try:
+            request_headers = {
+                "Host": f"{host}:{port}",
+                **HttpClient.get_proxy_headers(proxy),
+            }
+            writer.write(
+                "".join(
+                    [f"CONNECT {host}:{port} HTTP/1.1\r\n"]
+                    + [
+                        f"{name}: {value}\r\n"
+                        for name, value in request_headers.items()
+                    ]
+                    + ["\r\n"]
+                ).encode("latin-1")
+            )
+            await writer.drain()
+
+            status, reason, _ = await self.read_head(reader)
+            if status != HTTPStatus.OK:
+                raise OSError(f"Tunnel connection failed: {status} {reason}")
+
+            await writer.start_tls(self.ssl_context, server_hostname=host)
+        except BaseException:
+            writer.close()
+            raise
+
+        return reader, writer
+
+    async def get_connection(self, key: ConnectionKey) -> Tuple[Connection, bool]:
+        connections = self.idle_connections.get(key)
+        while connections:
+            connection = connections.pop()
+            if not connection[0].at_eof():
+                return connection, True
+
+            connection[1].close()
+
+        return await self.open_connection(key), False
+
+    def release_connection(self, key: ConnectionKey, connection: Connection) -> None:
+        self.idle_connections.setdefault(key, []).append(connection)
+
+    async def send(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        data: Optional[bytes],
+        timeout: float,
+    ) -> Tuple[ConnectionKey, Connection, ResponseHead]:
+        parsed = urlsplit(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise URLError(f"unsupported URL: {url}")
+
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        proxy = HttpClient.get_proxy(parsed.scheme, parsed.hostname)
+        key = (parsed.scheme, parsed.hostname, port, proxy)
+
+        target = parsed.path or "/"
+        if parsed.query:
+            target = f"{target}?{parsed.query}"
+        if proxy and parsed.scheme == "http":
+            target = url
+
+        request_headers = {
+            "Host": parsed.netloc.rpartition("@")[2],
+            "Accept-Encoding": "identity",
+            **headers,
+        }
+        if proxy and parsed.scheme == "http":
+            request_headers.update(HttpClient.get_proxy_headers(proxy))
+        if data is not None:
+            request_headers["Content-Length"] = str(len(data))
+
+        method = "GET" if data is None else "POST"
+        request = "".join(
+            [f"{method} {target} HTTP/1.1\r\n"]
+            + [f"{name}: {value}\r\n" for name, value in request_headers.items()]
+            + ["\r\n"]
+        ).encode("latin-1")
+
+        while True:
+            connection = None
+            reused = False
+
+            try:
+                async with asyncio.timeout(timeout):
+                    connection, reused = await self.get_connection(key)
+                    reader, writer = connection
+
+                    writer.write(request + (data or b""))
+                    await writer.drain()
+
+                    return key, connection, await self.read_head(reader)
+            except (OSError, ValueError, http.client.HTTPException) as e:
+                if connection:
+                    connection[1].close()
+                if reused:
+                    continue
+
+                raise URLError(e)
+            except BaseException:
+                if connection:
+                    connection[1].close()
+                raise
+
+    async def request(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+        retry: Optional[RetryState] = None,
+    ) -> AsyncHttpResponse:
+        retry = retry or self.retry_policy.begin(f"Request to {url}")
+
+        while True:
+            try:
+                return await self.request_once(url, headers, data, timeout)
+            except URLError as e:
+                delay = retry.next_delay(e)
+                if delay is None:
+                    raise
+
+                await asyncio.sleep(delay)
+
+    async def request_once(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncHttpResponse:
+        headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        timeout = self.timeout if timeout is None else timeout
+        origin = urlsplit(url).netloc
+        start = time.perf_counter()
+        redirects = 0
+
+        for _ in range(MAX_REDIRECTS + 1):
+            request_start = time.perf_counter()
+            key, connection, head = await self.send(url, headers, data, timeout)
+            response = AsyncHttpResponse(self, key, connection, head, url, timeout)
+
+            if response.status in REDIRECT_STATUSES:
+                location = response.headers.get("Location")
+                async with response:
+                    await response.read()
+
+                if not location:
+                    raise HTTPError(
+                        url,
+                        response.status,
+                        "Redirect without Location",
+                        response.headers,
+                        None,
+                    )
+
+                if response.status not in (
+                    HTTPStatus.TEMPORARY_REDIRECT,
+                    HTTPStatus.PERMANENT_REDIRECT,
+                ):
+                    data = None
+
+                url = urljoin(url, location)
+                if urlsplit(url).netloc != origin:
+                    headers.pop("Authorization", None)
+                redirects += 1
+                continue
+
+            if response.status >= HTTPStatus.MULTIPLE_CHOICES:
+                async with response:
+                    body = await response.read()
+
+                raise HTTPError(
+                    url,
+                    response.status,
+                    response.reason,
+                    response.headers,
+                    io.BytesIO(body),
+                )
+
+            if redirects:
+                response.redirects = redirects
+                response.redirect_seconds = request_start - start
+            return response
+
+        raise HTTPError(
+            url, response.status, "Too many redirects", response.headers, None
+        )
+
+    async def close(self) -> None:
+        for connections in self.idle_connections.values():
+            for _, writer in connections:
+                writer.close()
+
+        self.idle_connections.clear()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+import os
+from http import HTTPStatus
+from typing import Optional, Dict, Any, Tuple
+from urllib.error import URLError, HTTPError
+
+from .cache import ReleaseCache
+from .errors import (
+    DownloadError,
+    ManifestError,
+    ReleaseNotFoundError,
+    AssetNotFoundError,
+    DigestMismatchError,
+    HttpStatusError,
+    NetworkError,
+    DownloadTimeoutError,
+)
+from .index import ReleaseIndex, PAGE_SIZE
+from .store import ArtifactStore
+from ..utils import Metrics
+
+
+def get_download_error(error: URLError) -> DownloadError:
+    if isinstance(error, HTTPError):
+        return HttpStatusError(error.url, error.code, error.reason)
+
+    if isinstance(error.reason, TimeoutError):
+        return DownloadTimeoutError(f"Request timed out: {error.reason}")
+
+    return NetworkError(f"URL Error: {error.reason}")
+
+
+def get_release_error(error: URLError, repo: str, release: str) -> DownloadError:
+    if isinstance(error, HTTPError) and error.code == HTTPStatus.NOT_FOUND:
+        return ReleaseNotFoundError(repo, release)
+
+    return get_download_error(error)
+
+
+def get_asset_error(error: URLError, url: str) -> DownloadError:
+    if isinstance(error, HTTPError) and error.code == HTTPStatus.NOT_FOUND:
+        return AssetNotFoundError(os.path.basename(url), url)
+
+    return get_download_error(error)
+
+
+class BaseDownloader:
+    GITHUB_URL = "https://github.com"
+    GITHUB_API_URL = "https://api.github.com"
+
+    def __init__(
+        self,
+        github_token: Optional[str] = None,
+        direct_download: Optional[bool] = None,
+        release_cache: Optional[ReleaseCache] = None,
+        artifact_store: Optional[ArtifactStore] = None,
+        metrics: Optional[Metrics] = None,
+        mirror_url: Optional[str] = None,
+        release_index: Optional[ReleaseIndex] = None,
+    ):
+        self.github_token = github_token
+        self.direct_download = direct_download
+        self.release_cache = release_cache
+        self.artifact_store = artifact_store
+        self.metrics = metrics or Metrics()
+        self.mirror_url = mirror_url.rstrip("/") if mirror_url else None
+        self.release_index = release_index
+
+    def get_github_url(self) -> str:
+        return self.mirror_url or self.GITHUB_URL
+
+    def get_github_api_url(self) -> str:
+        return self.mirror_url or self.GITHUB_API_URL
+
+    def get_auth_headers(self) -> Dict[str, str]:
+        if not self.github_token or self.mirror_url:
+            return {}
+
+        return {"Authorization": f"token {self.github_token}"}
+
+    def use_direct_download(self, manifest_data: Dict[str, Any]) -> bool:
+        if self.direct_download is not None:
+            return self.direct_download
+
+        return manifest_data.get("direct_download", True)
+
+    def get_release_url(self, repo: str, release: str) -> str:
+        return f"{self.get_github_api_url()}/repos/{repo}/releases/tags/{release}"
+
+    def get_index_url(self, repo: str) -> str:
+        return f"{self.get_github_api_url()}/repos/{repo}/releases?per_page={PAGE_SIZE}"
+
+    def use_release_index(self) -> bool:
+        return self.release_index is not None and not self.mirror_url
+
+    def get_index_release(
+        self, entry: Optional[Dict[str, Any]], repo: str, release: str
+    ) -> Optional[Dict[str, Any]]:
+        if not entry:
+            return None
+
+        release_data = self.release_index.get_release_data(entry, release)
+        if release_data:
+            print(f"Using indexed release data for {repo} {release}")
+
+        return release_data
+
+    def get_release_headers(
+        self, cached: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, str]:
+        headers = {
+            "Accept": "application/vnd.github.v3+json",
+            **self.get_auth_headers(),
+        }
+
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        return headers
+
+    @staticmethod
+    def get_release_asset(
+        manifest_data: Dict[str, Any], arch: str, os_name: str, version: str
+    ) -> Tuple[str, str, str]:
+        repo = manifest_data.get("repo")
+        if not repo:
+            raise ManifestError("Repository not specified in manifest")
+
+        assets = manifest_data.get("assets")
+        if not assets:
+            raise ManifestError("Assets not specified in manifest")
+
+        release_pattern = manifest_data.get("release_pattern")
+        if not release_pattern:
+            release_pattern = "v{version}"
+
+        release = release_pattern.format(version=version)
+        if not release:
+            raise ManifestError(
+                "Release not specified and no default release pattern found"
+            )
+
+        os_assets = assets.get(os_name)
+        if not os_assets:
+            raise ManifestError(f"No assets found for OS {os_name}")
+
+        asset_url_template = os_assets.get(arch)
+        if not asset_url_template:
+            raise ManifestError(f"No assets found for ${os_name} {arch}")
+
+        expected_filename = asset_url_template.format(version=version, release=release)
+
+        return repo, release, expected_filename
+
+    def get_direct_asset(
+        self, repo: str, release: str, filename: str
+    ) -> Dict[str, Any]:
+        return {
+            "name": filename,
+            "browser_download_url": f"{self.get_github_url()}/{repo}/releases/download/{release}/{filename}",
+        }
+
+    @staticmethod
+    def get_asset(
+        release_data: Dict[str, Any], filename: str
+    ) -> Optional[Dict[str, Any]]:
+        return next(
+            (a for a in release_data.get("assets", []) if a["name"] == filename),
+            None,
+        )
+
+    @staticmethod
+    def check_asset_digest(asset: Dict[str, Any], expected_sha256: str) -> None:
+        digest = asset.get("digest") or ""
+        if not digest.startswith("sha256:"):
+            return
+
+        if digest.removeprefix("sha256:") != expected_sha256:
+            raise DigestMismatchError(
+                asset["name"], expected_sha256, digest.removeprefix("sha256:")
+            )
+
+    def get_indexed_asset(
+        self,
+        entry: Optional[Dict[str, Any]],
+        repo: str,
+        release: str,
+        filename: str,
+        expected_sha256: str,
+    ) -> Optional[Dict[str, Any]]:
+        asset = self.get_asset(
+            self.get_index_release(entry, repo, release) or {}, filename
+        )
+        if asset:
+            self.check_asset_digest(asset, expected_sha256)
+
+        return asset
+
+    def get_verified_asset(
+        self, release_data: Dict[str, Any], filename: str, expected_sha256: str
+    ) -> Dict[str, Any]:
+        asset = self.get_asset(release_data, filename)
+        if not asset:
+            raise AssetNotFoundError(filename)
+
+        self.check_asset_digest(asset, expected_sha256)
+        return asset
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from ..utils import get_cache_dir, atomic_write_bytes, get_env_bool
+
+DEFAULT_TTL = 600
+DEFAULT_MAX_ENTRIES = 256
+
+
+class ReleaseCache:
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        ttl: int = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.cache_dir = Path(cache_dir or get_cache_dir()) / "releases"
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @classmethod
+    def from_env(cls) -> Optional["ReleaseCache"]:
+        if get_env_bool("SETUP_EVERYTHING_RELEASE_CACHE") is False:
+            return None
+
+        ttl = os.getenv("SETUP_EVERYTHING_RELEASE_CACHE_TTL", "")
+        max_entries = os.getenv("SETUP_EVERYTHING_RELEASE_CACHE_SIZE", "")
+
+        return cls(
+            ttl=int(ttl) if ttl else DEFAULT_TTL,
+            max_entries=int(max_entries) if max_entries else DEFAULT_MAX_ENTRIES,
+        )
+
+    def get_path(self, repo: str, release: str) -> Path:
+        key = hashlib.sha256(f"{repo}@{release}".encode()).hexdigest()
+        return self.cache_dir / f"{key}.json"
+
+    def load(self, repo: str, release: str) -> Optional[Dict[str, Any]]:
+        path = self.get_path(repo, release)
+
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        if entry.get("repo") != repo or entry.get("release") != release:
+            return None
+
+        return entry
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry.get("fetched_at", 0) < self.ttl
+
+    def store(
+        self,
+        repo: str,
+        release: str,
+        data: Dict[str, Any],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        entry = {
+            "repo": repo,
+            "release": release,
+            "fetched_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "data": data,
+        }
+
+        try:
+            atomic_write_bytes(self.get_path(repo, release), json.dumps(entry).encode())
+            self.evict()
+        except OSError:
+            pass
+
+    def evict(self) -> None:
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+
+        if len(entries) <= self.max_entries:
+            return
+
+        entries.sort()
+        for _, path in entries[: len(entries) - self.max_entries]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
@@ -1,100 +1,416 @@
 #!/usr/bin/env python3
 
 from urllib.error import URLError, HTTPError
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, NoReturn, Tuple
 
 import hashlib
-import urllib.request
 import json
+import mmap
 import sys
 import os
 import argparse
+import http.client
 
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
-from ..utils import log_error, log_notice, append_github_output, load_manifest
-
-
-class Downloader:
-    def __init__(self, github_token: Optional[str] = None):
-        self.github_token = github_token
+from pathlib import Path
+from urllib.parse import urlsplit
+from .base import BaseDownloader, get_release_error, get_asset_error
+from .cache import ReleaseCache
+from .errors import (
+    DownloadError,
+    ManifestError,
+    ReleaseNotFoundError,
+    AssetNotFoundError,
+    ChecksumMismatchError,
+)
+from .index import ReleaseIndex, MAX_PAGES
+from .http_client import HttpClient, HttpResponse, get_http_client
+from .retry import RetryState
+from .store import ArtifactStore
+from ..utils import (
+    log_error,
+    log_notice,
+    append_github_output,
+    get_env_bool,
+    load_indexed_manifest,
+    Metrics,
+)
+
+CHUNK_SIZE = 1024 * 1024
+MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+
+
+class Downloader(BaseDownloader):
+    def __init__(
+        self,
+        github_token: Optional[str] = None,
+        direct_download: Optional[bool] = None,
+        release_cache: Optional[ReleaseCache] = None,
+        artifact_store: Optional[ArtifactStore] = None,
+        http_client: Optional[HttpClient] = None,
+        segments: int = 1,
+        metrics: Optional[Metrics] = None,
+        mirror_url: Optional[str] = None,
+        release_index: Optional[ReleaseIndex] = None,
+    ):
+        super().__init__(
+            github_token,
+            direct_download,
+            release_cache,
+            artifact_store,
+            metrics,
+            mirror_url,
+            release_index,
+        )
+        self.http_client = http_client or get_http_client()
+        self.segments = segments
+
+    @classmethod
+    def from_env(
+        cls,
+        github_token: Optional[str] = None,
+        direct_download: Optional[bool] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> "Downloader":
+        segments = os.getenv("SETUP_EVERYTHING_DOWNLOAD_SEGMENTS", "")
+
+        return cls(
+            github_token,
+            direct_download,
+            ReleaseCache.from_env(),
+            ArtifactStore.from_env(),
+            segments=int(segments) if segments else 1,
+            metrics=metrics,
+            mirror_url=os.getenv("SETUP_EVERYTHING_MIRROR") or None,
+            release_index=ReleaseIndex.from_env(),
+        )
 
     @staticmethod
     def is_archive(file_path: str) -> bool:
-        return file_path.endswith((".zip", ".tar.gz", ".tar.xz"))
+        return file_path.endswith(
+            (".zip", ".tar.gz", ".tar.xz", ".tar.zst", ".tar.bz2")
+        )
+
+    def open_url(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        retry: Optional[RetryState] = None,
+    ) -> HttpResponse:
+        with self.metrics.time("request"):
+            response = self.http_client.request(url, headers, retry=retry)
+            if response.redirects:
+                self.metrics.add_time("redirect", response.redirect_seconds)
+
+        self.metrics.count("requests")
+        self.metrics.count("redirects", response.redirects)
+        return response
 
     def fetch_release_data(self, repo: str, release: str) -> Dict[str, Any]:
-        api_url = f"https://api.github.com/repos/{repo}/releases/tags/{release}"
+        with self.metrics.time("api"):
+            release_data = self.get_indexed_release_data(repo, release)
+            if release_data:
+                return release_data
+
+            return self.fetch_release_data_once(repo, release)
+
+    def get_indexed_release_data(
+        self, repo: str, release: str
+    ) -> Optional[Dict[str, Any]]:
+        if not self.use_release_index():
+            return None
+
+        return self.get_index_release(self.get_index_entry(repo), repo, release)
+
+    def get_index_entry(self, repo: str) -> Optional[Dict[str, Any]]:
+        entry = self.release_index.load(repo)
+        if entry and self.release_index.is_fresh(entry):
+            return entry
+
+        return self.fetch_release_index(repo)
+
+    def fetch_release_index(self, repo: str) -> Optional[Dict[str, Any]]:
+        url = self.get_index_url(repo)
+        headers = self.get_release_headers()
+
+        print(f"Indexing releases of {repo}")
+
+        releases = {}
+        try:
+            for _ in range(MAX_PAGES):
+                with self.http_client.request(url, headers) as response:
+                    ReleaseIndex.add_page(releases, response.read())
+                    url = ReleaseIndex.get_next_url(response.headers.get("Link"))
+
+                self.metrics.count("requests")
+                if not url:
+                    break
+        except (HTTPError, URLError, ValueError, KeyError) as e:
+            log_notice(
+                f"Could not index releases of {repo}, looking them up one by one: {e}"
+            )
+            return None
+
+        return self.release_index.store(repo, releases)
 
-        headers = {
-            "Accept": "application/vnd.github.v3+json",
-        }
+    def fetch_release_data_once(self, repo: str, release: str) -> Dict[str, Any]:
+        api_url = self.get_release_url(repo, release)
 
-        if self.github_token:
-            headers["Authorization"] = f"token {self.github_token}"
+        cached = None
+        if self.release_cache:
+            cached = self.release_cache.load(repo, release)
 
-        request = urllib.request.Request(api_url, headers=headers)
+        if cached and self.release_cache.is_fresh(cached):
+            print(f"Using cached release data for {repo} {release}")
+            return cached["data"]
+
+        headers = self.get_release_headers(cached)
 
         print(f"Fetching releases from {api_url}")
 
         try:
-            with urllib.request.urlopen(request) as response:
-                return json.loads(response.read().decode())
+            with self.http_client.request(api_url, headers) as response:
+                release_data = json.loads(response.read().decode())
+                if self.release_cache:
+                    self.release_cache.store(
+                        repo,
+                        release,
+                        release_data,
+                        response.headers.get("ETag"),
+                        response.headers.get("Last-Modified"),
+                    )
+
+                return release_data
         except HTTPError as e:
-            if e.code == HTTPStatus.NOT_FOUND:
-                log_error(f"Release {release} not found in repository {repo}")
-                log_error(
-                    "Please raise a bug report at https://github.com/arcriver/setup-everything if this is unexpected"
+            if e.code == HTTPStatus.NOT_MODIFIED and cached:
+                print(f"Release data for {repo} {release} not modified")
+                self.release_cache.store(
+                    repo,
+                    release,
+                    cached["data"],
+                    e.headers.get("ETag") or cached.get("etag"),
+                    e.headers.get("Last-Modified") or cached.get("last_modified"),
                 )
-                sys.exit(1)
+                return cached["data"]
 
-            log_error(f"HTTP Error: {e.code} {e.reason}")
-            sys.exit(1)
+            raise get_release_error(e, repo, release) from e
         except URLError as e:
-            log_error(f"URL Error: {e.reason}")
-            sys.exit(1)
+            raise get_release_error(e, repo, release) from e
 
-    def download_asset(self, asset_url: str, output_file: str) -> None:
-        headers = {}
-        if self.github_token:
-            headers["Authorization"] = f"token {self.github_token}"
-
-        request = urllib.request.Request(asset_url, headers=headers)
+    def download_asset(
+        self,
+        asset_url: str,
+        output_file: str,
+        expected_sha256: str,
+        missing_ok: bool = False,
+    ) -> bool:
+        headers = self.get_auth_headers()
 
         print(f"Downloading asset from {asset_url}")
 
+        part_file = f"{output_file}.part"
+        resumed = os.path.exists(part_file)
+
         try:
-            with (
-                urllib.request.urlopen(request) as response,
-                open(output_file, "wb") as out_file,
-            ):
-                out_file.write(response.read())
+            if self.segments > 1:
+                calculated_sha256 = self.download_segments(
+                    asset_url, headers, part_file
+                )
+            else:
+                calculated_sha256 = self.download_stream(asset_url, headers, part_file)
+
+            if resumed and calculated_sha256 != expected_sha256:
+                log_notice(
+                    f"Resumed download of {output_file} does not match the expected checksum. Downloading it again."
+                )
+                os.remove(part_file)
+                calculated_sha256 = self.download_stream(asset_url, headers, part_file)
         except HTTPError as e:
-            if e.code == HTTPStatus.NOT_FOUND:
-                log_error(f"Asset not found: {asset_url}")
-                sys.exit(1)
+            if missing_ok and e.code == HTTPStatus.NOT_FOUND:
+                return False
 
-            log_error(f"HTTP Error: {e.code} {e.reason}")
-            sys.exit(1)
+            raise get_asset_error(e, asset_url) from e
         except URLError as e:
-            log_error(f"URL Error: {e.reason}")
-            sys.exit(1)
+            raise get_asset_error(e, asset_url) from e
 
-    @staticmethod
-    def get_checksum(file_path: str) -> str:
+        if calculated_sha256 != expected_sha256:
+            os.remove(part_file)
+            raise ChecksumMismatchError(expected_sha256, calculated_sha256)
+
+        print("Checksum verification passed.")
+        os.replace(part_file, output_file)
+
+        return True
+
+    def download_stream(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        part_file: str,
+        response: Optional[HttpResponse] = None,
+    ) -> str:
         sha256_hash = hashlib.sha256()
+        offset = 0
+
+        if os.path.exists(part_file):
+            with self.metrics.time("hash"):
+                offset = self.update_hash_from_file(sha256_hash, part_file)
+            log_notice(f"Resuming download of {part_file} from {offset} bytes.")
+
+        retry = self.http_client.retry_policy.begin(f"Download of {url}")
+        while True:
+            request_headers = dict(headers)
+            if offset:
+                request_headers["Range"] = f"bytes={offset}-"
+
+            if response is None:
+                try:
+                    response = self.open_url(url, request_headers, retry)
+                except HTTPError as e:
+                    if e.code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE and offset:
+                        return sha256_hash.hexdigest()
+
+                    raise
+
+            try:
+                with response:
+                    if offset and response.status != HTTPStatus.PARTIAL_CONTENT:
+                        sha256_hash = hashlib.sha256()
+                        offset = 0
+
+                    with (
+                        open(part_file, "r+b" if offset else "wb") as out_file,
+                        self.metrics.time("transfer"),
+                    ):
+                        out_file.seek(offset)
+                        out_file.truncate()
+
+                        for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                            with self.metrics.time("hash"):
+                                sha256_hash.update(chunk)
+                            out_file.write(chunk)
+                            offset += len(chunk)
+                            self.metrics.count("downloaded_bytes", len(chunk))
+
+                return sha256_hash.hexdigest()
+            except (OSError, http.client.HTTPException) as e:
+                log_notice(f"Download interrupted at {offset} bytes.")
+                if not retry.retry(e):
+                    raise URLError(e)
+
+                response = None
+
+    def download_range(
+        self, url: str, headers: Dict[str, str], part_file: str, start: int, end: int
+    ) -> None:
+        offset = start
+
+        retry = self.http_client.retry_policy.begin(f"Download of {url}")
+        while offset <= end:
+            request_headers = {**headers, "Range": f"bytes={offset}-{end}"}
+
+            try:
+                with (
+                    self.open_url(url, request_headers, retry) as response,
+                    open(part_file, "r+b") as out_file,
+                    self.metrics.time("transfer"),
+                ):
+                    if response.status != HTTPStatus.PARTIAL_CONTENT:
+                        raise URLError(f"Server ignored range request for {url}")
+
+                    out_file.seek(offset)
+                    for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                        out_file.write(chunk)
+                        offset += len(chunk)
+                        self.metrics.count("downloaded_bytes", len(chunk))
+            except URLError:
+                raise
+            except (OSError, http.client.HTTPException) as e:
+                log_notice(f"Segment download interrupted at {offset} bytes.")
+                if not retry.retry(e):
+                    raise URLError(e)
+
+    def download_segments(
+        self, url: str, headers: Dict[str, str], part_file: str
+    ) -> str:
+        response = self.open_url(url, {**headers, "Range": "bytes=0-0"})
+        if response.status != HTTPStatus.PARTIAL_CONTENT:
+            return self.download_stream(url, headers, part_file, response)
 
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(chunk)
+        with response:
+            response.read()
+            content_range = response.headers.get("Content-Range", "")
+            segment_url = response.url
+
+        total_size = content_range.rpartition("/")[2]
+        if not total_size.isdigit():
+            return self.download_stream(url, headers, part_file)
+
+        total_size = int(total_size)
+        if total_size < self.segments * MIN_SEGMENT_SIZE:
+            return self.download_stream(url, headers, part_file)
+
+        if urlsplit(segment_url).netloc != urlsplit(url).netloc:
+            headers = {}
+
+        segment_size = -(-total_size // self.segments)
+        ranges = [
+            (start, min(start + segment_size, total_size) - 1)
+            for start in range(0, total_size, segment_size)
+        ]
+
+        with open(part_file, "wb") as out_file:
+            out_file.truncate(total_size)
+
+        sha256_hash = hashlib.sha256()
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+                futures = [
+                    executor.submit(
+                        self.download_range, segment_url, headers, part_file, start, end
+                    )
+                    for start, end in ranges
+                ]
+
+                for (start, end), future in zip(ranges, futures):
+                    future.result()
+
+                    with self.metrics.time("hash"):
+                        self.update_hash_from_file(
+                            sha256_hash, part_file, start, end + 1
+                        )
+        except BaseException:
+            os.remove(part_file)
+            raise
 
         return sha256_hash.hexdigest()
 
     @staticmethod
-    def verify_checksum(file_path: str, expected_sha256: str) -> None:
-        calculated_sha256 = Downloader.get_checksum(file_path)
-        if calculated_sha256 != expected_sha256:
-            os.remove(file_path)
+    def update_hash_from_file(
+        sha256_hash, file_path: str, start: int = 0, end: Optional[int] = None
+    ) -> int:
+        with open(file_path, "rb") as f:
+            if end is None:
+                end = os.fstat(f.fileno()).st_size
+            if end <= start:
+                return 0
+
+            with mmap.mmap(f.fileno(), end, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped)[start:end] as view:
+                    sha256_hash.update(view)
+
+        return end - start
 
+    @staticmethod
+    def get_checksum(file_path: str) -> str:
+        with open(file_path, "rb", buffering=0) as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+    @staticmethod
+    def compare_checksum(calculated_sha256: str, expected_sha256: str) -> None:
+        if calculated_sha256 != expected_sha256:
             log_error(
                 f"Checksum verification failed!\n"
                 f"Expected: {expected_sha256.ljust(32)}\n"
@@ -104,6 +420,32 @@ class Downloader:
 
         print("Checksum verification passed.")
 
+    @staticmethod
+    def verify_checksum(file_path: str, expected_sha256: str) -> None:
+        calculated_sha256 = Downloader.get_checksum(file_path)
+        if calculated_sha256 != expected_sha256:
+            os.remove(file_path)
+
+        Downloader.compare_checksum(calculated_sha256, expected_sha256)
+
+    def resolve_release_asset(
+        self, manifest_data: Dict[str, Any], arch: str, os_name: str, version: str
+    ) -> Tuple[str, str, str]:
+        try:
+            return self.get_release_asset(manifest_data, arch, os_name, version)
+        except ManifestError as e:
+            log_error(str(e))
+            sys.exit(1)
+
+    def find_release_asset(
+        self, repo: str, release: str, filename: str
+    ) -> Dict[str, Any]:
+        asset = self.get_asset(self.fetch_release_data(repo, release), filename)
+        if not asset:
+            raise AssetNotFoundError(filename)
+
+        return asset
+
     def get_release(
         self,
         arch: str,
@@ -113,54 +455,16 @@ class Downloader:
         expected_sha256: str,
         manifest: str,
     ) -> Any:
-        manifest_data = load_manifest(manifest)
-
-        repo = manifest_data.get("repo")
-        if not repo:
-            log_error("Repository not specified in manifest")
-            sys.exit(1)
-
-        assets = manifest_data.get("assets")
-        if not assets:
-            log_error("Assets not specified in manifest")
-            sys.exit(1)
+        manifest_data = load_indexed_manifest(manifest)
 
-        release_pattern = manifest_data.get("release_pattern")
-        if not release_pattern:
-            release_pattern = "v{version}"
-
-        release = release_pattern.format(version=version)
-        if not release:
-            log_error("Release not specified and no default release pattern found")
-            sys.exit(1)
-
-        os_assets = assets.get(os_name)
-        if not os_assets:
-            log_error(f"No assets found for OS {os_name}")
-            sys.exit(1)
-
-        asset_url_template = os_assets.get(arch)
-        if not asset_url_template:
-            log_error(f"No assets found for ${os_name} {arch}")
-            sys.exit(1)
-
-        expected_filename = asset_url_template.format(version=version, release=release)
-
-        release_data = self.fetch_release_data(repo, release)
-        asset = next(
-            (
-                a
-                for a in release_data.get("assets", [])
-                if a["name"] == expected_filename
-            ),
-            None,
+        repo, release, filename = self.resolve_release_asset(
+            manifest_data, arch, os_name, version
         )
 
-        if not asset:
-            log_error(f"No matching asset found for filename: {expected_filename}")
-            sys.exit(1)
-
-        return asset
+        try:
+            return self.find_release_asset(repo, release, filename)
+        except DownloadError as e:
+            self.exit_with_error(e)
 
     def download_release_asset(
         self,
@@ -171,24 +475,139 @@ class Downloader:
         expected_sha256: str,
         manifest: str,
     ) -> str:
-        asset = self.get_release(
-            arch, os_name, version, output_file, expected_sha256, manifest
+        return self.download_manifest_asset(
+            load_indexed_manifest(manifest),
+            arch,
+            os_name,
+            version,
+            output_file,
+            expected_sha256,
         )
 
-        filename = asset["name"]
-        asset_url = asset["browser_download_url"]
+    @staticmethod
+    def exit_with_error(error: DownloadError) -> NoReturn:
+        log_error(str(error))
+        if isinstance(error, ReleaseNotFoundError):
+            log_error(
+                "Please raise a bug report at https://github.com/arcriver/setup-everything if this is unexpected"
+            )
+
+        sys.exit(1)
+
+    def download_manifest_asset(
+        self,
+        manifest_data: Dict[str, Any],
+        arch: str,
+        os_name: str,
+        version: str,
+        output_file: str,
+        expected_sha256: str,
+    ) -> str:
+        try:
+            return self.fetch_manifest_asset(
+                manifest_data, arch, os_name, version, output_file, expected_sha256
+            )
+        except DownloadError as e:
+            self.exit_with_error(e)
+
+    def fetch_manifest_asset(
+        self,
+        manifest_data: Dict[str, Any],
+        arch: str,
+        os_name: str,
+        version: str,
+        output_file: str,
+        expected_sha256: str,
+    ) -> str:
+        repo, release, filename = self.get_release_asset(
+            manifest_data, arch, os_name, version
+        )
 
         append_github_output("filename", filename)
 
         if os.path.exists(output_file):
-            log_notice(f"File {output_file} already exists. Skipping download.")
-        else:
-            self.download_asset(asset_url, output_file)
+            with self.metrics.time("hash"):
+                calculated_sha256 = self.get_checksum(output_file)
+
+            if calculated_sha256 == expected_sha256:
+                log_notice(f"File {output_file} already exists. Skipping download.")
+                return filename
+
+            log_notice(
+                f"File {output_file} does not match the expected checksum. Downloading it again."
+            )
+            os.remove(output_file)
+
+        if self.artifact_store:
+            with self.metrics.time("store"):
+                stored = self.artifact_store.fetch(expected_sha256, output_file)
+
+            if stored:
+                with self.metrics.time("hash"):
+                    calculated_sha256 = self.get_checksum(output_file)
+
+                if calculated_sha256 == expected_sha256:
+                    log_notice(f"Using {filename} from the artifact store.")
+                    return filename
+
+                log_notice(
+                    f"Stored copy of {filename} does not match the expected checksum. Downloading it again."
+                )
+                os.remove(output_file)
+                self.artifact_store.remove(expected_sha256)
 
-        self.verify_checksum(output_file, expected_sha256)
+        self.fetch_asset(
+            repo, release, filename, output_file, expected_sha256, manifest_data
+        )
+
+        if self.artifact_store:
+            with self.metrics.time("store"):
+                self.artifact_store.add(expected_sha256, output_file)
 
         return filename
 
+    def fetch_asset(
+        self,
+        repo: str,
+        release: str,
+        filename: str,
+        output_file: str,
+        expected_sha256: str,
+        manifest_data: Dict[str, Any],
+    ) -> None:
+        if self.use_release_index():
+            with self.metrics.time("api"):
+                entry = self.get_index_entry(repo)
+
+            asset = self.get_indexed_asset(
+                entry, repo, release, filename, expected_sha256
+            )
+            if asset:
+                self.download_asset(
+                    asset["browser_download_url"], output_file, expected_sha256
+                )
+                return
+
+        if self.use_direct_download(manifest_data):
+            asset = self.get_direct_asset(repo, release, filename)
+            if self.download_asset(
+                asset["browser_download_url"],
+                output_file,
+                expected_sha256,
+                missing_ok=True,
+            ):
+                return
+
+            log_notice(
+                f"Asset {filename} not found at its release download URL. "
+                "Falling back to the releases API."
+            )
+
+        asset = self.get_verified_asset(
+            self.fetch_release_data(repo, release), filename, expected_sha256
+        )
+        self.download_asset(asset["browser_download_url"], output_file, expected_sha256)
+
 
 def download_from_env(manifest: str) -> str:
     arch = os.getenv("ARCH", "")
@@ -197,13 +616,18 @@ def download_from_env(manifest: str) -> str:
     output_file = os.getenv("FILE", "")
     expected_sha256 = os.getenv("SHA256", "")
     github_token = os.getenv("GITHUB_TOKEN", "")
+    direct_download = get_env_bool("DIRECT_DOWNLOAD")
 
     if not all([arch, os_name, version, output_file, expected_sha256]):
         log_error("Missing required environment variables")
         sys.exit(1)
 
-    downloader = Downloader(github_token)
-    return downloader.download_release_asset(
+    downloader = Downloader.from_env(
+        github_token,
+        direct_download,
+        Metrics({"tool": Path(manifest).parent.name, "version": version}),
+    )
+    filename = downloader.download_release_asset(
         arch=arch,
         os_name=os_name,
         version=version,
@@ -211,6 +635,9 @@ def download_from_env(manifest: str) -> str:
         expected_sha256=expected_sha256,
         manifest=manifest,
     )
+    downloader.metrics.emit()
+
+    return filename
 
 
 def parse_arguments():
@@ -243,6 +670,11 @@ def parse_arguments():
         required=True,
         help="Path of application manifest to use for downloading the asset",
     )
+    parser.add_argument(
+        "--direct-download",
+        action=argparse.BooleanOptionalAction,
+        help="Download from the release download URL without querying the releases API first (default: manifest setting, otherwise enabled)",
+    )
 
     return parser.parse_args()
 
@@ -251,7 +683,11 @@ def main():
     args = parse_arguments()
 
     if all([args.arch, args.os, args.version, args.file, args.sha256]):
-        downloader = Downloader(args.github_token)
+        downloader = Downloader.from_env(
+            args.github_token,
+            args.direct_download,
+            Metrics({"tool": Path(args.manifest).parent.name, "version": args.version}),
+        )
         downloader.download_release_asset(
             arch=args.arch,
             os_name=args.os,
@@ -260,5 +696,6 @@ def main():
             expected_sha256=args.sha256,
             manifest=args.manifest,
         )
+        downloader.metrics.emit()
     else:
         download_from_env(args.manifest)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+from typing import Optional
+
+
+class DownloadError(Exception):
+    pass
+
+
+class ManifestError(DownloadError):
+    pass
+
+
+class ReleaseNotFoundError(DownloadError):
+    def __init__(self, repo: str, release: str):
+        super().__init__(f"Release {release} not found in repository {repo}")
+        self.repo = repo
+        self.release = release
+
+
+class AssetNotFoundError(DownloadError):
+    def __init__(self, filename: str, url: Optional[str] = None):
+        super().__init__(
+            f"Asset not found: {url}"
+            if url
+            else f"No matching asset found for filename: {filename}"
+        )
+        self.filename = filename
+        self.url = url
+
+
+class ChecksumMismatchError(DownloadError):
+    def __init__(self, expected_sha256: str, calculated_sha256: str):
+        super().__init__(
+            f"Checksum verification failed! Expected {expected_sha256}, got {calculated_sha256}"
+        )
+        self.expected_sha256 = expected_sha256
+        self.calculated_sha256 = calculated_sha256
+
+
+class DigestMismatchError(DownloadError):
+    def __init__(self, filename: str, expected_sha256: str, published_sha256: str):
+        super().__init__(
+            f"Checksum does not match the digest published for {filename}! Expected {expected_sha256}, published {published_sha256}"
+        )
+        self.filename = filename
+        self.expected_sha256 = expected_sha256
+        self.published_sha256 = published_sha256
+
+
+class HttpStatusError(DownloadError):
+    def __init__(self, url: str, status: int, reason: str):
+        super().__init__(f"HTTP Error: {status} {reason} for {url}")
+        self.url = url
+        self.status = status
+        self.reason = reason
+
+
+class NetworkError(DownloadError):
+    pass
+
+
+class DownloadTimeoutError(NetworkError, TimeoutError):
+    pass
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+
+import base64
+import http.client
+import io
+import threading
+import time
+import urllib.request
+from http import HTTPStatus
+from typing import Optional, Dict, List, Tuple
+from urllib.error import URLError, HTTPError
+from urllib.parse import urlsplit, urljoin, unquote
+
+from .retry import RetryPolicy, RetryState
+
+DEFAULT_TIMEOUT = 60
+MAX_REDIRECTS = 10
+USER_AGENT = "setup-everything"
+
+REDIRECT_STATUSES = {
+    HTTPStatus.MOVED_PERMANENTLY,
+    HTTPStatus.FOUND,
+    HTTPStatus.SEE_OTHER,
+    HTTPStatus.TEMPORARY_REDIRECT,
+    HTTPStatus.PERMANENT_REDIRECT,
+}
+
+ConnectionKey = Tuple[str, str, int, Optional[str]]
+
+
+class HttpResponse:
+    def __init__(
+        self,
+        client: "HttpClient",
+        key: ConnectionKey,
+        connection: http.client.HTTPConnection,
+        response: http.client.HTTPResponse,
+        url: str,
+    ):
+        self.client = client
+        self.key = key
+        self.connection = connection
+        self.response = response
+        self.url = url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self.redirects = 0
+        self.redirect_seconds = 0.0
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self.response.read(amt)
+
+    def readinto(self, buffer) -> int:
+        return self.response.readinto(buffer)
+
+    def close(self) -> None:
+        if self.connection is None:
+            return
+
+        reusable = self.response.isclosed() and not self.response.will_close
+        self.response.close()
+
+        if reusable:
+            self.client.release_connection(self.key, self.connection)
+        else:
+            self.connection.close()
+
+        self.connection = None
+
+    def __enter__(self) -> "HttpResponse":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class HttpClient:
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.idle_connections: Dict[
+            ConnectionKey, List[http.client.HTTPConnection]
+        ] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_proxy(scheme: str, host: str) -> Optional[str]:
+        proxy = urllib.request.getproxies().get(scheme)
+        if not proxy or urllib.request.proxy_bypass(host):
+            return None
+
+        return proxy
+
+    @staticmethod
+    def get_proxy_headers(proxy: Optional[str]) -> Dict[str, str]:
+        proxy_url = urlsplit(proxy) if proxy else None
+        if not proxy_url or proxy_url.username is None:
+            return {}
+
+        credentials = (
+            f"{unquote(proxy_url.username)}:{unquote(proxy_url.password or '')}"
+        )
+        token = base64.b64encode(credentials.encode()).decode()
+        return {"Proxy-Authorization": f"Basic {token}"}
+
+    def get_connection(
+        self, key: ConnectionKey
+    ) -> Tuple[http.client.HTTPConnection, bool]:
+        with self.lock:
+            connections = self.idle_connections.get(key)
+            if connections:
+                return connections.pop(), True
+
+        scheme, host, port, proxy = key
+
+        if proxy:
+            proxy_url = urlsplit(proxy)
+            proxy_port = proxy_url.port or (443 if proxy_url.scheme == "https" else 80)
+            connection_class = (
+                http.client.HTTPSConnection
+                if proxy_url.scheme == "https"
+                else http.client.HTTPConnection
+            )
+            connection = connection_class(
+                proxy_url.hostname, proxy_port, timeout=self.timeout
+            )
+            if scheme == "https":
+                connection.set_tunnel(host, port, self.get_proxy_headers(proxy))
+            return connection, False
+
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout), False
+
+        return http.client.HTTPConnection(host, port, timeout=self.timeout), False
+
+    def release_connection(
+        self, key: ConnectionKey, connection: http.client.HTTPConnection
+    ) -> None:
+        with self.lock:
+            self.idle_connections.setdefault(key, []).append(connection)
+
+    def send(
+        self, url: str, headers: Dict[str, str], data: Optional[bytes] = None
+    ) -> Tuple[ConnectionKey, http.client.HTTPConnection, http.client.HTTPResponse]:
+        parsed = urlsplit(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise URLError(f"unsupported URL: {url}")
+
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        proxy = self.get_proxy(parsed.scheme, parsed.hostname)
+        key = (parsed.scheme, parsed.hostname, port, proxy)
+
+        target = parsed.path or "/"
+        if parsed.query:
+            target = f"{target}?{parsed.query}"
+        if proxy and parsed.scheme == "http":
+            target = url
+            headers = {**headers, **self.get_proxy_headers(proxy)}
+
+        while True:
+            connection, reused = self.get_connection(key)
+
+            try:
+                connection.request(
+                    "GET" if data is None else "POST", target, data, headers
+                )
+                return key, connection, connection.getresponse()
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                if reused:
+                    continue
+
+                raise URLError(e)
+
+    def request(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[bytes] = None,
+        retry: Optional[RetryState] = None,
+    ) -> HttpResponse:
+        retry = retry or self.retry_policy.begin(f"Request to {url}")
+
+        while True:
+            try:
+                return self.request_once(url, headers, data)
+            except URLError as e:
+                if not retry.retry(e):
+                    raise
+
+    def request_once(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[bytes] = None,
+    ) -> HttpResponse:
+        headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        origin = urlsplit(url).netloc
+        start = time.perf_counter()
+        redirects = 0
+
+        for _ in range(MAX_REDIRECTS + 1):
+            request_start = time.perf_counter()
+            key, connection, response = self.send(url, headers, data)
+            http_response = HttpResponse(self, key, connection, response, url)
+
+            if response.status in REDIRECT_STATUSES:
+                location = response.headers.get("Location")
+                response.read()
+                http_response.close()
+
+                if not location:
+                    raise HTTPError(
+                        url,
+                        response.status,
+                        "Redirect without Location",
+                        response.headers,
+                        None,
+                    )
+
+                if response.status not in (
+                    HTTPStatus.TEMPORARY_REDIRECT,
+                    HTTPStatus.PERMANENT_REDIRECT,
+                ):
+                    data = None
+
+                url = urljoin(url, location)
+                if urlsplit(url).netloc != origin:
+                    headers.pop("Authorization", None)
+                redirects += 1
+                continue
+
+            if response.status >= HTTPStatus.MULTIPLE_CHOICES:
+                body = response.read()
+                http_response.close()
+                raise HTTPError(
+                    url,
+                    response.status,
+                    response.reason,
+                    response.headers,
+                    io.BytesIO(body),
+                )
+
+            if redirects:
+                http_response.redirects = redirects
+                http_response.redirect_seconds = request_start - start
+            return http_response
+
+        raise HTTPError(
+            url, response.status, "Too many redirects", response.headers, None
+        )
+
+    def close(self) -> None:
+        with self.lock:
+            for connections in self.idle_connections.values():
+                for connection in connections:
+                    connection.close()
+
+            self.idle_connections.clear()
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient(retry_policy=RetryPolicy.from_env())
+
+        return _client
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from ..utils import get_cache_dir, atomic_write_bytes, get_env_bool
+
+DEFAULT_TTL = 24 * 60 * 60
+PAGE_SIZE = 100
+MAX_PAGES = 10
+
+LINK_NEXT_PATTERN = re.compile(r'<([^>]+)>\s*;\s*rel="next"')
+
+
+class ReleaseIndex:
+    def __init__(self, cache_dir: Optional[Path] = None, ttl: int = DEFAULT_TTL):
+        self.cache_dir = Path(cache_dir or get_cache_dir()) / "index"
+        self.ttl = ttl
+
+    @classmethod
+    def from_env(cls) -> Optional["ReleaseIndex"]:
+        if not get_env_bool("SETUP_EVERYTHING_RELEASE_INDEX"):
+            return None
+
+        ttl = os.getenv("SETUP_EVERYTHING_RELEASE_INDEX_TTL", "")
+
+        return cls(ttl=int(ttl) if ttl else DEFAULT_TTL)
+
+    @staticmethod
+    def get_next_url(link_header: Optional[str]) -> Optional[str]:
+        match = LINK_NEXT_PATTERN.search(link_header or "")
+        return match.group(1) if match else None
+
+    @staticmethod
+    def add_page(releases: Dict[str, Dict[str, Dict[str, Any]]], body: bytes) -> None:
+        for release_data in json.loads(body.decode()):
+            releases[release_data["tag_name"]] = ReleaseIndex.get_assets(release_data)
+
+    @staticmethod
+    def get_assets(release_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        return {
+            asset["name"]: {
+                "url": asset["browser_download_url"],
+                "size": asset.get("size"),
+                "digest": asset.get("digest"),
+            }
+            for asset in release_data.get("assets", [])
+        }
+
+    def get_path(self, repo: str) -> Path:
+        key = hashlib.sha256(repo.encode()).hexdigest()
+        return self.cache_dir / f"{key}.json"
+
+    def load(self, repo: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.get_path(repo), "r") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        if entry.get("repo") != repo:
+            return None
+
+        return entry
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry.get("fetched_at", 0) < self.ttl
+
+    def store(
+        self, repo: str, releases: Dict[str, Dict[str, Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        entry = {
+            "repo": repo,
+            "fetched_at": time.time(),
+            "releases": releases,
+        }
+
+        try:
+            atomic_write_bytes(self.get_path(repo), json.dumps(entry).encode())
+        except OSError:
+            pass
+
+        return entry
+
+    @staticmethod
+    def get_release_data(
+        entry: Dict[str, Any], release: str
+    ) -> Optional[Dict[str, Any]]:
+        assets = entry["releases"].get(release)
+        if assets is None:
+            return None
+
+        return {
+            "tag_name": release,
+            "assets": [
+                {
+                    "name": name,
+                    "browser_download_url": asset["url"],
+                    "size": asset["size"],
+                    "digest": asset["digest"],
+                }
+                for name, asset in assets.items()
+            ],
+        }
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+import http.client
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+from typing import Optional
+from urllib.error import URLError, HTTPError
+
+from ..utils import log_notice
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 60.0
+DEFAULT_BUDGET = 300.0
+
+RETRY_STATUSES = {
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+}
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        budget: float = DEFAULT_BUDGET,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        max_attempts = os.getenv("SETUP_EVERYTHING_RETRIES", "")
+        budget = os.getenv("SETUP_EVERYTHING_RETRY_BUDGET", "")
+
+        return cls(
+            max_attempts=int(max_attempts) if max_attempts else DEFAULT_MAX_ATTEMPTS,
+            budget=float(budget) if budget else DEFAULT_BUDGET,
+        )
+
+    def begin(self, description: str) -> "RetryState":
+        return RetryState(self, description)
+
+    def get_backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    @staticmethod
+    def get_rate_limit_delay(error: HTTPError) -> Optional[float]:
+        headers = error.headers
+        if not headers:
+            return None
+
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            if retry_after.strip().isdigit():
+                return float(retry_after)
+
+            try:
+                return max(
+                    0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()
+                )
+            except (TypeError, ValueError):
+                return None
+
+        reset = headers.get("X-RateLimit-Reset")
+        if headers.get("X-RateLimit-Remaining") == "0" and reset and reset.isdigit():
+            return max(0.0, int(reset) - time.time()) + 1
+
+        return None
+
+    def get_delay(self, attempt: int, error: BaseException) -> Optional[float]:
+        if isinstance(error, HTTPError):
+            delay = None
+            if error.code == HTTPStatus.FORBIDDEN or error.code in RETRY_STATUSES:
+                delay = self.get_rate_limit_delay(error)
+
+            if delay is not None:
+                return delay
+
+            if error.code in RETRY_STATUSES:
+                return self.get_backoff(attempt)
+
+            return None
+
+        if isinstance(error, (URLError, OSError, http.client.HTTPException)):
+            return self.get_backoff(attempt)
+
+        return None
+
+
+class RetryState:
+    def __init__(self, policy: RetryPolicy, description: str):
+        self.policy = policy
+        self.description = description
+        self.attempt = 1
+        self.waited = 0.0
+
+    def next_delay(self, error: BaseException) -> Optional[float]:
+        if self.attempt >= self.policy.max_attempts:
+            return None
+
+        delay = self.policy.get_delay(self.attempt - 1, error)
+        if delay is None:
+            return None
+
+        if self.waited + delay > self.policy.budget:
+            log_notice(
+                f"{self.description} failed ({error}). Not retrying, waiting {delay:.1f}s would exceed the retry budget."
+            )
+            return None
+
+        self.attempt += 1
+        self.waited += delay
+
+        log_notice(
+            f"{self.description} failed ({error}). Retrying in {delay:.1f}s (attempt {self.attempt}/{self.policy.max_attempts})."
+        )
+
+        return delay
+
+    def retry(self, error: BaseException) -> bool:
+        delay = self.next_delay(error)
+        if delay is None:
+            return False
+
+        time.sleep(delay)
+        return True
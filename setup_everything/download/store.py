@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+from ..utils import get_cache_dir, get_env_bool, link_or_copy, file_lock
+
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024 * 1024
+
+SHA256_PATTERN = re.compile(r"^[a-f0-9]{64}$")
+
+
+class ArtifactStore:
+    def __init__(
+        self,
+        store_dir: Optional[Path] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.store_dir = Path(store_dir or get_cache_dir()) / "sha256"
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_env(cls) -> Optional["ArtifactStore"]:
+        if not get_env_bool("SETUP_EVERYTHING_ARTIFACT_STORE"):
+            return None
+
+        return cls(max_bytes=cls.max_bytes_from_env())
+
+    @staticmethod
+    def max_bytes_from_env() -> int:
+        max_bytes = os.getenv("SETUP_EVERYTHING_ARTIFACT_STORE_SIZE", "")
+        return int(max_bytes) if max_bytes else DEFAULT_MAX_BYTES
+
+    def get_path(self, digest: str) -> Path:
+        if not SHA256_PATTERN.match(digest):
+            raise ValueError(f"Invalid SHA256 digest: {digest}")
+
+        return self.store_dir / digest
+
+    def contains(self, digest: str) -> bool:
+        return self.get_path(digest).is_file()
+
+    def fetch(self, digest: str, output_file: str) -> bool:
+        path = self.get_path(digest)
+
+        try:
+            link_or_copy(path, Path(output_file))
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+
+        return True
+
+    def remove(self, digest: str) -> None:
+        try:
+            self.get_path(digest).unlink()
+        except FileNotFoundError:
+            pass
+
+    def add(self, digest: str, file_path: str) -> None:
+        path = self.get_path(digest)
+
+        try:
+            with file_lock(self.store_dir / ".lock"):
+                if not path.is_file():
+                    link_or_copy(Path(file_path), path)
+
+                self.evict()
+        except OSError:
+            pass
+
+    def evict(self) -> None:
+        entries = []
+        total_bytes = 0
+        for path in self.store_dir.iterdir():
+            if not SHA256_PATTERN.match(path.name):
+                continue
+
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_bytes += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+            total_bytes -= size
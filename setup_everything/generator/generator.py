@@ -1,20 +1,50 @@
 import json
 import argparse
+import hashlib
+import os
 import sys
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from jinja2 import Environment, FileSystemLoader
 
+from ..utils import validate_manifest_schema, build_manifest_index
+from ..utils.index import INDEX_FILENAME
+
+PARALLEL_THRESHOLD = 32
+
+OUTPUT_TEMPLATES = {
+    "action": "action.yml.j2",
+    "workflow": "workflow.yml.j2",
+    "many_action": "many_action.yml.j2",
+    "many_workflow": "many_workflow.yml.j2",
+}
+
+GENERATOR_SOURCES = [
+    Path(__file__),
+    Path(__file__).parent.parent / "utils" / "index.py",
+    Path(__file__).parent.parent / "utils" / "common.py",
+]
+
+_generators: Dict[Tuple[str, str, bool], "ActionGenerator"] = {}
+
 
 class ActionGenerator:
     def __init__(
-        self, manifest_dir: str = "manifests", template_dir: Optional[str] = None
+        self,
+        manifest_dir: str = "manifests",
+        template_dir: Optional[str] = None,
+        fused: bool = True,
     ):
         self.manifest_dir = Path(manifest_dir)
+        self.fused = fused
         self.template_dir = (
             Path(template_dir) if template_dir else Path(__file__).parent / "templates"
         )
+        self._manifest_sources = None
+        self._manifests = None
+        self._generator_hash = None
         self._setup_jinja_env()
 
     def _setup_jinja_env(self):
@@ -44,12 +74,201 @@ class ActionGenerator:
         with open(manifest_path, "r") as f:
             return json.load(f)
 
+    def load_schema(self) -> Dict[str, Any]:
+        return self.load_manifest(self.manifest_dir / "schema.json")
+
+    def validate_manifest(
+        self, manifest: Dict[str, Any], tool_name: str, schema: Dict[str, Any]
+    ) -> None:
+        for field in schema.get("required", []):
+            if field not in manifest:
+                raise ValueError(f"Missing required field '{field}' in {tool_name}")
+
+        if schema.get("additionalProperties") is False:
+            for field in manifest:
+                if field not in schema.get("properties", {}):
+                    raise ValueError(f"Unknown field '{field}' in {tool_name}")
+
+        validate_manifest_schema(manifest)
+
+    def generate_manifest_index(self) -> str:
+        manifests = self.get_all_manifests()
+        schema = self.load_schema()
+
+        for tool_name, manifest in manifests.items():
+            self.validate_manifest(manifest, tool_name, schema)
+
+        index = build_manifest_index(manifests, self.get_manifest_sources())
+        return json.dumps(index, separators=(",", ":"), sort_keys=True) + "\n"
+
+    def write_manifest_index(self):
+        index_file = self.manifest_dir / INDEX_FILENAME
+        with open(index_file, "w") as f:
+            f.write(self.generate_manifest_index())
+
+    def get_manifest_sources(self) -> Dict[str, bytes]:
+        if self._manifest_sources is None:
+            self._manifest_sources = {
+                manifest_file.parent.name: manifest_file.read_bytes()
+                for manifest_file in sorted(self.manifest_dir.glob("*/manifest.json"))
+            }
+        return self._manifest_sources
+
     def get_all_manifests(self) -> Dict[str, Dict[str, Any]]:
-        manifests = {}
-        for manifest_file in self.manifest_dir.glob("*/manifest.json"):
-            tool_name = manifest_file.parent.name
-            manifests[tool_name] = self.load_manifest(manifest_file)
-        return manifests
+        if self._manifests is None:
+            self._manifests = {
+                tool_name: json.loads(source)
+                for tool_name, source in self.get_manifest_sources().items()
+            }
+        return self._manifests
+
+    def plan_outputs(
+        self, action_output_dir: Path, workflow_output_dir: Path
+    ) -> List[Tuple[Path, str, Optional[str]]]:
+        outputs = []
+
+        for tool_name, manifest in self.get_all_manifests().items():
+            outputs.append(
+                (
+                    action_output_dir / f"setup-{tool_name}" / "action.yml",
+                    "action",
+                    tool_name,
+                )
+            )
+            if "test" in manifest:
+                outputs.append(
+                    (
+                        workflow_output_dir / f"setup-{tool_name}.yml",
+                        "workflow",
+                        tool_name,
+                    )
+                )
+
+        outputs.append(
+            (action_output_dir / "setup-many" / "action.yml", "many_action", None)
+        )
+        outputs.append((workflow_output_dir / "setup-many.yml", "many_workflow", None))
+        outputs.append((self.manifest_dir / INDEX_FILENAME, "index", None))
+
+        return outputs
+
+    def get_generator_hash(self) -> str:
+        if self._generator_hash is None:
+            generator_hash = hashlib.sha256()
+            for source in GENERATOR_SOURCES:
+                generator_hash.update(source.read_bytes())
+            self._generator_hash = generator_hash.hexdigest()
+        return self._generator_hash
+
+    def get_input_hash(self, kind: str, tool_name: Optional[str]) -> str:
+        input_hash = hashlib.sha256(f"{kind}:{self.fused}".encode())
+        input_hash.update(self.get_generator_hash().encode())
+
+        if tool_name:
+            input_hash.update(self.get_manifest_sources()[tool_name])
+        else:
+            for name, source in self.get_manifest_sources().items():
+                input_hash.update(name.encode())
+                input_hash.update(source)
+
+        if kind == "index":
+            input_hash.update((self.manifest_dir / "schema.json").read_bytes())
+        else:
+            input_hash.update((self.template_dir / OUTPUT_TEMPLATES[kind]).read_bytes())
+
+        return input_hash.hexdigest()
+
+    def render_output(self, kind: str, tool_name: Optional[str]) -> Optional[str]:
+        if kind == "action":
+            return self.generate_action(self.get_all_manifests()[tool_name], tool_name)
+        if kind == "workflow":
+            return self.generate_workflow(
+                self.get_all_manifests()[tool_name], tool_name
+            )
+        if kind == "many_action":
+            return self.generate_many_action()
+        if kind == "many_workflow":
+            return self.generate_many_workflow()
+
+        return self.generate_manifest_index()
+
+    def render_outputs(
+        self, stale: List[Tuple[Path, str, Optional[str]]], jobs: int
+    ) -> List[Optional[str]]:
+        if jobs <= 1 or len(stale) < PARALLEL_THRESHOLD:
+            return [self.render_output(kind, tool_name) for _, kind, tool_name in stale]
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(
+                executor.map(
+                    _render_output,
+                    [
+                        (
+                            str(self.manifest_dir),
+                            str(self.template_dir),
+                            self.fused,
+                            kind,
+                            tool_name,
+                        )
+                        for _, kind, tool_name in stale
+                    ],
+                )
+            )
+
+    def generate(
+        self,
+        action_output_dir: Path,
+        workflow_output_dir: Path,
+        check: bool = False,
+        jobs: int = 1,
+        cache_file: Optional[Path] = None,
+    ) -> List[Path]:
+        state = {}
+        if cache_file and not check and cache_file.exists():
+            try:
+                state = json.loads(cache_file.read_text())
+            except json.JSONDecodeError:
+                state = {}
+
+        stale = []
+        input_hashes = {}
+        for output in self.plan_outputs(action_output_dir, workflow_output_dir):
+            path, kind, tool_name = output
+            input_hash = self.get_input_hash(kind, tool_name)
+            input_hashes[path] = input_hash
+
+            entry = state.get(str(path))
+            if (
+                entry
+                and entry.get("input") == input_hash
+                and path.exists()
+                and hashlib.sha256(path.read_bytes()).hexdigest() == entry.get("output")
+            ):
+                continue
+
+            stale.append(output)
+
+        changed = []
+        for (path, _, _), content in zip(stale, self.render_outputs(stale, jobs)):
+            if content is None:
+                continue
+
+            data = content.encode()
+            if not path.exists() or path.read_bytes() != data:
+                changed.append(path)
+                if not check:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    path.write_bytes(data)
+
+            state[str(path)] = {
+                "input": input_hashes[path],
+                "output": hashlib.sha256(data).hexdigest(),
+            }
+
+        if cache_file and not check:
+            cache_file.write_text(json.dumps(state, indent=2, sort_keys=True) + "\n")
+
+        return changed
 
     def generate_action(
         self,
@@ -68,6 +287,7 @@ class ActionGenerator:
             "extract_patterns": manifest["extract_patterns"],
             "platforms": list(manifest["assets"].keys()),
             "architectures": self._get_all_architectures(manifest["assets"]),
+            "fused": self.fused,
         }
 
         return template.render(**context)
@@ -126,6 +346,41 @@ class ActionGenerator:
 
         return workflows
 
+    def generate_many_action(self, template_name: str = "many_action.yml.j2") -> str:
+        template = self.jinja_env.get_template(template_name)
+        manifests = self.get_all_manifests()
+
+        platforms = set()
+        architectures = set()
+        for manifest in manifests.values():
+            platforms.update(manifest["assets"].keys())
+            architectures.update(self._get_all_architectures(manifest["assets"]))
+
+        context = {
+            "tool_names": sorted(manifests.keys()),
+            "platforms": sorted(platforms),
+            "architectures": sorted(architectures),
+        }
+
+        return template.render(**context)
+
+    def generate_many_workflow(
+        self, template_name: str = "many_workflow.yml.j2"
+    ) -> Optional[str]:
+        template = self.jinja_env.get_template(template_name)
+
+        manifests = {
+            tool_name: manifest
+            for tool_name, manifest in sorted(self.get_all_manifests().items())
+            if "X64" in manifest["assets"].get("Linux", {})
+            and "X64" in manifest.get("test", {}).get("checksums", {}).get("Linux", {})
+        }
+
+        if not manifests:
+            return None
+
+        return template.render(manifests=manifests)
+
     def write_action_files(
         self, output_dir: Path, template_name: str = "action.yml.j2"
     ):
@@ -139,6 +394,16 @@ class ActionGenerator:
             with open(action_file, "w") as f:
                 f.write(action_content)
 
+    def write_many_action_file(
+        self, output_dir: Path, template_name: str = "many_action.yml.j2"
+    ):
+        action_dir = output_dir / "setup-many"
+        action_dir.mkdir(parents=True, exist_ok=True)
+
+        action_file = action_dir / "action.yml"
+        with open(action_file, "w") as f:
+            f.write(self.generate_many_action(template_name))
+
     def write_workflow_files(
         self, output_dir: Path, template_name: str = "workflow.yml.j2"
     ):
@@ -154,16 +419,41 @@ class ActionGenerator:
             with open(workflow_file, "w") as f:
                 f.write(workflow_content)
 
+    def write_many_workflow_file(
+        self, output_dir: Path, template_name: str = "many_workflow.yml.j2"
+    ):
+        workflow_content = self.generate_many_workflow(template_name)
+
+        if not workflow_content:
+            return
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+        workflow_file = output_dir / "setup-many.yml"
+        with open(workflow_file, "w") as f:
+            f.write(workflow_content)
+
+
+def _render_output(args: Tuple[str, str, bool, str, Optional[str]]) -> Optional[str]:
+    manifest_dir, template_dir, fused, kind, tool_name = args
+
+    key = (manifest_dir, template_dir, fused)
+    if key not in _generators:
+        _generators[key] = ActionGenerator(manifest_dir, template_dir, fused)
+
+    return _generators[key].render_output(kind, tool_name)
+
 
 def generate_actions_from_manifests(
     manifest_dir: str = "manifests",
     output_dir: str = ".github/actions",
     template_dir: Optional[str] = None,
     template_name: str = "action.yml.j2",
+    fused: bool = True,
 ) -> None:
-    generator = ActionGenerator(manifest_dir, template_dir)
+    generator = ActionGenerator(manifest_dir, template_dir, fused)
     output_path = Path(output_dir)
     generator.write_action_files(output_path, template_name)
+    generator.write_many_action_file(output_path)
 
 
 def generate_workflows_from_manifests(
@@ -175,6 +465,7 @@ def generate_workflows_from_manifests(
     generator = ActionGenerator(manifest_dir, template_dir)
     output_path = Path(output_dir)
     generator.write_workflow_files(output_path, template_name)
+    generator.write_many_workflow_file(output_path)
 
 
 def main():
@@ -192,6 +483,11 @@ def main():
         action="store_true",
         help="Show generated content without writing files",
     )
+    parser.add_argument(
+        "--split-steps",
+        action="store_true",
+        help="Generate actions with separate download and install steps instead of a single setup step",
+    )
     parser.add_argument(
         "--action-output-dir",
         default=".github/actions",
@@ -202,11 +498,29 @@ def main():
         default=".github/workflows",
         help="Output directory for generated workflows (default: .github/workflows)",
     )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit with an error if any generated file is out of date instead of writing it (ignores the cache file)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of processes used to render templates (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--cache-file",
+        default=".generator-cache.json",
+        help="File recording the inputs of generated files to skip unchanged ones (default: .generator-cache.json)",
+    )
 
     args = parser.parse_args()
 
     try:
-        generator = ActionGenerator(args.manifest_dir, args.template_dir)
+        generator = ActionGenerator(
+            args.manifest_dir, args.template_dir, not args.split_steps
+        )
 
         if args.dry_run:
             workflows = generator.generate_all_workflows()
@@ -215,21 +529,50 @@ def main():
                 print(workflow_content)
                 print()
 
+            many_workflow = generator.generate_many_workflow()
+            if many_workflow:
+                print("Generated test workflow for many")
+                print(many_workflow)
+                print()
+
             actions = generator.generate_all_actions()
             for tool_name, action_content in actions.items():
                 print(f"Generated action for {tool_name}")
                 print(action_content)
                 print()
+
+            print("Generated action for many")
+            print(generator.generate_many_action())
+            print()
+            return
+
+        changed = generator.generate(
+            Path(args.action_output_dir),
+            Path(args.workflow_output_dir),
+            check=args.check,
+            jobs=args.jobs,
+            cache_file=Path(args.cache_file) if args.cache_file else None,
+        )
+
+        if args.check:
+            for path in changed:
+                print(f"Out of date: {path}")
+
+            if changed:
+                print(
+                    "Run 'python -m setup_everything.generator' to update generated files",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+
+            print("All generated files are up to date")
         else:
-            generate_workflows_from_manifests(
-                args.manifest_dir, args.workflow_output_dir, args.template_dir
-            )
-            print(f"Generated all test workflows in {args.workflow_output_dir}")
+            for path in changed:
+                print(f"Updated {path}")
 
-            generate_actions_from_manifests(
-                args.manifest_dir, args.action_output_dir, args.template_dir
+            print(
+                f"Generated actions in {args.action_output_dir} and workflows in {args.workflow_output_dir}"
             )
-            print(f"Generated all actions in {args.action_output_dir}")
 
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
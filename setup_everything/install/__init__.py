@@ -1,3 +1,4 @@
 from .install import Installer
+from .layout import ToolLayout
 
-__all__ = ["Installer"]
+__all__ = ["Installer", "ToolLayout"]
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+import shutil
+import subprocess
+import sys
+import tarfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, List, Iterator
+
+from ..utils import log_error
+
+MAGIC_NUMBERS = {
+    "gz": b"\x1f\x8b",
+    "xz": b"\xfd7zXZ\x00",
+    "zst": b"\x28\xb5\x2f\xfd",
+    "bz2": b"BZh",
+}
+
+PIPE_BUFFER_SIZE = 1024 * 1024
+
+DECOMPRESSORS = {
+    "gz": [["pigz", "-dc"]],
+    "xz": [["xz", "-dc", "-T0"]],
+    "zst": [["zstd", "-dcq"]],
+    "bz2": [["lbzip2", "-dc"], ["pbzip2", "-dc"]],
+}
+
+
+def detect_compression(file_path: Path) -> Optional[str]:
+    with open(file_path, "rb") as f:
+        header = f.read(6)
+
+    for compression, magic in MAGIC_NUMBERS.items():
+        if header.startswith(magic):
+            return compression
+
+    return None
+
+
+def find_decompressor(compression: Optional[str]) -> Optional[List[str]]:
+    for command in DECOMPRESSORS.get(compression, []):
+        executable = shutil.which(command[0])
+        if executable:
+            return [executable, *command[1:]]
+
+    return None
+
+
+def is_compressed_tarfile(file_path: Path) -> bool:
+    return tarfile.is_tarfile(file_path) or detect_compression(file_path) == "zst"
+
+
+@contextmanager
+def open_external_tar(file_path: Path, command: List[str]) -> Iterator[tarfile.TarFile]:
+    with open(file_path, "rb") as f:
+        process = subprocess.Popen(
+            command, stdin=f, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+
+    completed = False
+    try:
+        with tarfile.open(fileobj=process.stdout, mode="r|") as tar_ref:
+            yield tar_ref
+            completed = True
+    finally:
+        if completed:
+            while process.stdout.read(PIPE_BUFFER_SIZE):
+                pass
+        else:
+            process.kill()
+
+        process.stdout.close()
+
+        _, stderr = process.communicate()
+
+    if process.returncode != 0:
+        log_error(f"{Path(command[0]).name} failed: {stderr.decode().strip()}")
+        sys.exit(1)
+
+
+@contextmanager
+def open_tar(file_path: Path, external: bool = True) -> Iterator[tarfile.TarFile]:
+    compression = detect_compression(file_path)
+
+    command = find_decompressor(compression) if external else None
+    if command:
+        with open_external_tar(file_path, command) as tar_ref:
+            yield tar_ref
+        return
+
+    if compression == "zst" and "zst" not in tarfile.TarFile.OPEN_METH:
+        log_error("zstd is required to extract .tar.zst archives")
+        sys.exit(1)
+
+    with tarfile.open(file_path, "r:*") as tar_ref:
+        yield tar_ref
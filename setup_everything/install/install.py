@@ -1,19 +1,50 @@
 #!/usr/bin/env python3
 
 import argparse
+import json
+import posixpath
 import shutil
-import tarfile
-import tempfile
 import zipfile
 import sys
 import os
+import tarfile
+from contextlib import closing
 from pathlib import Path
-from typing import Optional, List, Dict, Any
-
-from ..utils import log_error, load_manifest, append_github_path
+from typing import Optional, List, Dict, Any, IO, Iterator, Tuple, Set
+
+from ..utils import (
+    log_error,
+    log_notice,
+    load_indexed_manifest,
+    append_github_path,
+    atomic_write_bytes,
+    clone_or_copy,
+    Metrics,
+)
+from .decompress import open_tar, is_compressed_tarfile
+from .layout import ToolLayout
+from .members import MemberStore
+from .patterns import PatternMatcher
+
+COPY_BUFFER_SIZE = 1024 * 1024
+RECEIPT_DIR = ".setup-everything"
 
 
 class Installer:
+    def __init__(
+        self,
+        external_decompressors: bool = True,
+        metrics: Optional[Metrics] = None,
+        member_store: Optional[MemberStore] = None,
+    ):
+        self.external_decompressors = external_decompressors
+        self.metrics = metrics or Metrics()
+        self.member_store = member_store
+
+    @classmethod
+    def from_env(cls, metrics: Optional[Metrics] = None) -> "Installer":
+        return cls(metrics=metrics, member_store=MemberStore.from_env())
+
     @staticmethod
     def get_extract_patterns(manifest: Dict[str, Any]) -> Optional[List[str]]:
         extract_patterns = manifest.get("extract_patterns")
@@ -28,62 +59,313 @@ class Installer:
 
     @staticmethod
     def should_extract_file(filename: str, patterns: Optional[List[str]]) -> bool:
-        if not patterns:
-            return True
+        return PatternMatcher(patterns).match(filename)
 
-        return any(pattern in filename for pattern in patterns)
-
-    def extract_zip(
-        self, zip_path: Path, temp_dir: str, patterns: Optional[List[str]]
-    ) -> None:
+    def iter_zip_members(self, zip_path: Path) -> Iterator[Tuple[str, IO[bytes]]]:
         with zipfile.ZipFile(zip_path, "r") as zip_ref:
-            for member in zip_ref.namelist():
-                if self.should_extract_file(member, patterns):
-                    zip_ref.extract(member, temp_dir)
+            for member in zip_ref.infolist():
+                if member.is_dir():
+                    continue
+
+                with zip_ref.open(member) as source:
+                    yield member.filename, source
+
+    def iter_tar_members(
+        self, tar_path: Path, links: Optional[Dict[str, Optional[str]]] = None
+    ) -> Iterator[Tuple[str, IO[bytes]]]:
+        with open_tar(tar_path, self.external_decompressors) as tar_ref:
+            for member in tar_ref:
+                if links is not None and (member.issym() or member.islnk()):
+                    links[member.name] = self.get_link_target(member)
+                    continue
+
+                if not member.isfile():
+                    continue
+
+                with tar_ref.extractfile(member) as source:
+                    yield member.name, source
+
+    @staticmethod
+    def write_executable(source: IO[bytes], dest_path: Path) -> int:
+        temp_file = dest_path.with_name(f".{dest_path.name}.{os.getpid()}.tmp")
+
+        try:
+            with open(temp_file, "wb") as out_file:
+                shutil.copyfileobj(source, out_file, COPY_BUFFER_SIZE)
+                size = out_file.tell()
+
+            temp_file.chmod(0o755)
+            os.replace(temp_file, dest_path)
+            return size
+        finally:
+            if temp_file.exists():
+                temp_file.unlink()
+
+    @staticmethod
+    def normalize_member_name(member_name: str) -> str:
+        return posixpath.normpath(member_name.replace("\\", "/"))
+
+    @staticmethod
+    def get_link_target(member: tarfile.TarInfo) -> Optional[str]:
+        if member.islnk():
+            target = member.linkname
+        elif posixpath.isabs(member.linkname):
+            return None
+        else:
+            target = posixpath.join(posixpath.dirname(member.name), member.linkname)
+
+        target = Installer.normalize_member_name(target)
+        if target == ".." or target.startswith("../") or posixpath.isabs(target):
+            return None
+
+        return target
+
+    @staticmethod
+    def resolve_link(
+        member_name: str, links: Dict[str, Optional[str]]
+    ) -> Optional[str]:
+        targets = {
+            Installer.normalize_member_name(name): target
+            for name, target in links.items()
+        }
+
+        target = links[member_name]
+        for _ in range(len(targets)):
+            if target not in targets:
+                return target
 
-    def extract_tar(
-        self, tar_path: Path, temp_dir: str, patterns: Optional[List[str]]
+            target = targets[target]
+
+        return None
+
+    def install_member(self, source: IO[bytes], dest_path: Path) -> None:
+        if self.member_store:
+            size, reused = self.member_store.install(source, dest_path)
+            dest_path.chmod(0o755)
+            if reused:
+                self.metrics.count("reused_bytes", size)
+                self.metrics.count("reused_files")
+        else:
+            size = self.write_executable(source, dest_path)
+
+        self.metrics.count("installed_bytes", size)
+        self.metrics.count("installed_files")
+
+    def extract_members(
+        self,
+        members: Iterator[Tuple[str, IO[bytes]]],
+        install_dir: Path,
+        patterns: Optional[List[str]],
+    ) -> Set[str]:
+        matcher = PatternMatcher(patterns)
+        installed = set()
+
+        for member_name, source in members:
+            filename = matcher.get_filename(member_name)
+            if filename in installed or not matcher.match(member_name):
+                continue
+
+            self.install_member(source, install_dir / filename)
+            installed.add(filename)
+
+            if matcher.is_satisfied(installed):
+                break
+
+        return installed
+
+    def extract_tar_links(
+        self,
+        tar_path: Path,
+        links: Dict[str, Optional[str]],
+        install_dir: Path,
+        patterns: Optional[List[str]],
+        installed: Set[str],
+    ) -> Set[str]:
+        matcher = PatternMatcher(patterns)
+        wanted: Dict[str, List[str]] = {}
+        linked_names = set()
+
+        for member_name in links:
+            filename = matcher.get_filename(member_name)
+            if filename in installed or not matcher.match(member_name):
+                continue
+
+            target = self.resolve_link(member_name, links)
+            if target is None:
+                log_error(
+                    f"Cannot install {member_name}: its link target is outside the archive"
+                )
+                sys.exit(1)
+
+            if filename not in linked_names:
+                linked_names.add(filename)
+                wanted.setdefault(target, []).append(filename)
+
+        if not wanted:
+            return set()
+
+        with closing(self.iter_tar_members(tar_path)) as members:
+            for member_name, source in members:
+                filenames = wanted.pop(self.normalize_member_name(member_name), None)
+                if not filenames:
+                    continue
+
+                first, *others = filenames
+                self.install_member(source, install_dir / first)
+
+                for filename in others:
+                    size = self.link_executable(
+                        install_dir / first, install_dir / filename
+                    )
+                    self.metrics.count("installed_bytes", size)
+                    self.metrics.count("installed_files")
+
+                if not wanted:
+                    break
+
+        if wanted:
+            log_error(f"Cannot install links to missing members: {', '.join(wanted)}")
+            sys.exit(1)
+
+        return linked_names
+
+    @staticmethod
+    def link_executable(source_path: Path, dest_path: Path) -> int:
+        temp_file = dest_path.with_name(f".{dest_path.name}.{os.getpid()}.tmp")
+
+        try:
+            linked = False
+            if source_path.stat().st_nlink == 1:
+                try:
+                    os.link(source_path, temp_file)
+                    linked = True
+                except OSError:
+                    pass
+
+            if linked:
+                size = temp_file.stat().st_size
+            else:
+                size = clone_or_copy(source_path, temp_file)
+
+            temp_file.chmod(0o755)
+            os.replace(temp_file, dest_path)
+            return size
+        finally:
+            if temp_file.exists():
+                temp_file.unlink()
+
+    def copy_file(self, file_path: Path, install_dir: Path) -> Set[str]:
+        with self.metrics.time("copy"):
+            size = self.link_executable(file_path, install_dir / file_path.name)
+
+        self.metrics.count("installed_bytes", size)
+        self.metrics.count("installed_files")
+        return {file_path.name}
+
+    @staticmethod
+    def get_receipt_path(install_dir, manifest: Dict[str, Any]) -> Path:
+        return Path(install_dir) / RECEIPT_DIR / f"{manifest['name']}.json"
+
+    def get_installed_asset(
+        self, install_dir, manifest: Dict[str, Any], expected_sha256: str
+    ) -> Optional[str]:
+        try:
+            with open(self.get_receipt_path(install_dir, manifest), "r") as f:
+                receipt = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        if receipt.get("sha256") != expected_sha256 or not receipt.get("files"):
+            return None
+
+        for filename, expected in receipt["files"].items():
+            try:
+                stat = (Path(install_dir) / filename).stat()
+            except OSError:
+                return None
+
+            if (stat.st_size, stat.st_mtime_ns) != (
+                expected.get("size"),
+                expected.get("mtime_ns"),
+            ):
+                return None
+
+        return receipt.get("name")
+
+    def write_receipt(
+        self,
+        install_dir: Path,
+        manifest: Dict[str, Any],
+        expected_sha256: str,
+        name: str,
+        filenames: Set[str],
     ) -> None:
-        with tarfile.open(tar_path, "r:*") as tar_ref:
-            for member in tar_ref.getmembers():
-                if self.should_extract_file(member.name, patterns):
-                    tar_ref.extract(member, temp_dir, filter="data")
+        files = {}
+        for filename in sorted(filenames):
+            stat = (install_dir / filename).stat()
+            files[filename] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+        receipt = {
+            "tool": manifest["name"],
+            "name": name,
+            "sha256": expected_sha256,
+            "files": files,
+        }
+        atomic_write_bytes(
+            self.get_receipt_path(install_dir, manifest),
+            (json.dumps(receipt, indent=2) + "\n").encode(),
+        )
 
     def install_asset(
-        self, file_path, name, install_dir, manifest: Dict[str, Any]
+        self,
+        file_path,
+        name,
+        install_dir,
+        manifest: Dict[str, Any],
+        expected_sha256: Optional[str] = None,
     ) -> None:
         file_path = Path(file_path)
         name = Path(name)
 
         install_dir = Path(install_dir)
+
+        if expected_sha256:
+            if self.get_installed_asset(install_dir, manifest, expected_sha256):
+                log_notice(
+                    f"{manifest['name']} is already installed in {install_dir}. Skipping installation."
+                )
+                return
+
+            self.get_receipt_path(install_dir, manifest).unlink(missing_ok=True)
+
         install_dir.mkdir(parents=True, exist_ok=True)
 
         extract_patterns = self.get_extract_patterns(manifest)
 
+        links: Dict[str, Optional[str]] = {}
         if zipfile.is_zipfile(file_path):
-            with tempfile.TemporaryDirectory() as temp_dir:
-                self.extract_zip(file_path, temp_dir, extract_patterns)
-
-                for item in Path(temp_dir).rglob("*"):
-                    if item.is_file():
-                        dest_path = install_dir / item.name
-                        shutil.copy2(item, dest_path)
-                        dest_path.chmod(0o755)
+            members = self.iter_zip_members(file_path)
+        elif is_compressed_tarfile(file_path):
+            members = self.iter_tar_members(file_path, links)
+        else:
+            members = None
 
-        elif tarfile.is_tarfile(file_path):
-            with tempfile.TemporaryDirectory() as temp_dir:
-                self.extract_tar(file_path, temp_dir, extract_patterns)
+        if members is None:
+            installed = self.copy_file(file_path, install_dir)
+        else:
+            with closing(members), self.metrics.time("extract"):
+                installed = self.extract_members(members, install_dir, extract_patterns)
 
-                for item in Path(temp_dir).rglob("*"):
-                    if item.is_file():
-                        dest_path = install_dir / item.name
-                        shutil.copy2(item, dest_path)
-                        dest_path.chmod(0o755)
+            if links:
+                with self.metrics.time("extract"):
+                    installed |= self.extract_tar_links(
+                        file_path, links, install_dir, extract_patterns, installed
+                    )
 
-        else:
-            dest_path = install_dir / file_path.name
-            shutil.copy2(file_path, dest_path)
-            dest_path.chmod(0o755)
+        if expected_sha256 and installed:
+            self.write_receipt(
+                install_dir, manifest, expected_sha256, name.name, installed
+            )
 
 
 def parse_arguments():
@@ -102,6 +384,10 @@ def parse_arguments():
         required=True,
         help="Path of application manifest to use for installation patterns",
     )
+    parser.add_argument(
+        "--sha256",
+        help="SHA256 checksum of the asset, used to skip installation if it is already installed",
+    )
 
     return parser.parse_args()
 
@@ -110,25 +396,52 @@ def install_from_env(manifest_path: str) -> None:
     file_path = os.getenv("FILE", "")
     name = os.getenv("NAME", "")
     install_dir = os.getenv("INSTALL_DIR", "")
+    expected_sha256 = os.getenv("SHA256", "")
+    version = os.getenv("VERSION", "")
+    layout = ToolLayout.from_env()
 
-    if not all([file_path, name, install_dir]):
+    if not all([file_path, name, install_dir]) or (layout and not version):
         log_error("Missing required environment variables")
         sys.exit(1)
 
-    installer = Installer()
-    manifest = load_manifest(manifest_path)
-    installer.install_asset(file_path, name, install_dir, manifest)
+    installer = Installer.from_env(Metrics({"tool": Path(manifest_path).parent.name}))
+    manifest = load_indexed_manifest(manifest_path)
+
+    download_metrics = os.getenv("METRICS", "")
+    if download_metrics:
+        try:
+            installer.metrics.merge(json.loads(download_metrics))
+        except (json.JSONDecodeError, AttributeError, TypeError) as e:
+            log_error(f"Invalid download metrics: {e}")
+            sys.exit(1)
+
+    if layout:
+        install_dir = str(layout.get_bin_dir(manifest["name"], version))
+        with layout.lock(manifest["name"], version):
+            installer.install_asset(
+                file_path, name, install_dir, manifest, expected_sha256
+            )
+        layout.activate(manifest["name"], version)
+    else:
+        installer.install_asset(file_path, name, install_dir, manifest, expected_sha256)
+
+    installer.metrics.emit()
 
     append_github_path(install_dir)
 
 
 def main():
     args = parse_arguments()
-    manifest = load_manifest(args.manifest)
+    manifest = load_indexed_manifest(args.manifest)
 
     if all([args.file, args.install_dir]):
-        installer = Installer()
-        installer.install_asset(args.file, args.name, args.install_dir, manifest)
+        installer = Installer.from_env(
+            Metrics({"tool": Path(args.manifest).parent.name})
+        )
+        installer.install_asset(
+            args.file, args.name, args.install_dir, manifest, args.sha256
+        )
+        installer.metrics.emit()
         print(f"Successfully installed asset to {args.install_dir}")
     else:
         install_from_env(args.manifest)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Iterator
+
+from ..utils import log_error, log_notice, file_lock
+
+CURRENT_LINK = "current"
+
+
+class ToolLayout:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    @classmethod
+    def from_env(cls) -> Optional["ToolLayout"]:
+        root = os.getenv("SETUP_EVERYTHING_TOOLS_DIR")
+        if not root:
+            return None
+
+        return cls(Path(root))
+
+    def get_tool_dir(self, tool: str) -> Path:
+        return self.root / tool
+
+    def get_version_dir(self, tool: str, version: str) -> Path:
+        if (
+            version in ("", ".", "..", CURRENT_LINK)
+            or version.startswith(".")
+            or "/" in version
+            or "\\" in version
+        ):
+            log_error(f"Invalid version {version} for {tool} in {self.root}")
+            sys.exit(1)
+
+        return self.get_tool_dir(tool) / version
+
+    def get_bin_dir(self, tool: str, version: str) -> Path:
+        return self.get_version_dir(tool, version) / "bin"
+
+    def get_current_dir(self, tool: str) -> Path:
+        return self.get_tool_dir(tool) / CURRENT_LINK
+
+    @contextmanager
+    def lock(self, tool: str, version: str) -> Iterator[None]:
+        version_dir = self.get_version_dir(tool, version)
+        with file_lock(version_dir.with_name(f".{version}.lock")):
+            yield
+
+    def activate(self, tool: str, version: str) -> bool:
+        version_dir = self.get_version_dir(tool, version)
+        current = self.get_current_dir(tool)
+
+        try:
+            if os.readlink(current) == version_dir.name:
+                return True
+        except OSError:
+            pass
+
+        temp_link = current.with_name(
+            f".{CURRENT_LINK}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+
+        try:
+            os.symlink(version_dir.name, temp_link, target_is_directory=True)
+            os.replace(temp_link, current)
+        except OSError as e:
+            log_notice(f"Could not switch {current} to {version}: {e}")
+            return False
+        finally:
+            if temp_link.is_symlink():
+                temp_link.unlink()
+
+        return True
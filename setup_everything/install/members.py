@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, IO, Tuple
+
+from ..utils import get_cache_dir, get_env_bool, link_or_copy, file_lock
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class MemberStore:
+    def __init__(
+        self,
+        store_dir: Optional[Path] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.store_dir = Path(store_dir or get_cache_dir()) / "members"
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_env(cls) -> Optional["MemberStore"]:
+        if not get_env_bool("SETUP_EVERYTHING_MEMBER_STORE"):
+            return None
+
+        max_bytes = os.getenv("SETUP_EVERYTHING_MEMBER_STORE_SIZE", "")
+
+        return cls(max_bytes=int(max_bytes) if max_bytes else DEFAULT_MAX_BYTES)
+
+    def get_path(self, digest: str) -> Path:
+        return self.store_dir / digest
+
+    def install(self, source: IO[bytes], dest_path: Path) -> Tuple[int, bool]:
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        fd, temp_file = tempfile.mkstemp(dir=self.store_dir, prefix=".member-")
+        sha256_hash = hashlib.sha256()
+        size = 0
+
+        try:
+            with os.fdopen(fd, "wb") as out_file:
+                while chunk := source.read(COPY_BUFFER_SIZE):
+                    sha256_hash.update(chunk)
+                    out_file.write(chunk)
+                    size += len(chunk)
+
+            path = self.get_path(sha256_hash.hexdigest())
+            try:
+                link_or_copy(path, dest_path)
+                return size, True
+            except FileNotFoundError:
+                pass
+
+            os.chmod(temp_file, 0o755)
+            link_or_copy(Path(temp_file), dest_path)
+            os.replace(temp_file, path)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+        self.evict()
+        return size, False
+
+    def evict(self) -> None:
+        try:
+            with file_lock(self.store_dir / ".lock"):
+                entries = []
+                total_bytes = 0
+                for path in self.store_dir.iterdir():
+                    if path.name.startswith("."):
+                        continue
+
+                    try:
+                        stat = path.stat()
+                    except FileNotFoundError:
+                        continue
+
+                    if stat.st_nlink == 1:
+                        entries.append((stat.st_mtime, stat.st_size, path))
+                        total_bytes += stat.st_size
+
+                entries.sort()
+                for _, size, path in entries:
+                    if total_bytes <= self.max_bytes:
+                        break
+
+                    path.unlink(missing_ok=True)
+                    total_bytes -= size
+        except OSError:
+            pass
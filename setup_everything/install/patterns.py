@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import fnmatch
+import re
+from pathlib import PurePosixPath
+from typing import Optional, List, Set
+
+GLOB_CHARACTERS = "*?["
+REGEX_PREFIX = "re:"
+
+
+class PatternMatcher:
+    def __init__(self, patterns: Optional[List[str]]):
+        self.patterns = patterns or []
+        self.names = {}
+        name_globs = []
+        path_regexes = []
+
+        for pattern in self.patterns:
+            if pattern.startswith(REGEX_PREFIX):
+                path_regexes.append(f"(?:{pattern[len(REGEX_PREFIX) :]})")
+            elif any(character in pattern for character in GLOB_CHARACTERS):
+                name_globs.append(fnmatch.translate(pattern))
+            else:
+                self.names[pattern] = pattern.removesuffix(".exe")
+
+        self.name_regex = re.compile("|".join(name_globs)) if name_globs else None
+        self.path_regex = re.compile("|".join(path_regexes)) if path_regexes else None
+        self.required = set(self.names.values())
+
+    @staticmethod
+    def get_filename(member_name: str) -> str:
+        return PurePosixPath(member_name.replace("\\", "/")).name
+
+    def match(self, member_name: str) -> bool:
+        if not self.patterns:
+            return True
+
+        filename = self.get_filename(member_name)
+        if filename in self.names:
+            return True
+
+        if self.name_regex and self.name_regex.match(filename):
+            return True
+
+        return bool(self.path_regex and self.path_regex.search(member_name))
+
+    def is_satisfied(self, filenames: Set[str]) -> bool:
+        if not self.patterns or self.name_regex or self.path_regex:
+            return False
+
+        matched = {self.names[f] for f in filenames if f in self.names}
+        return matched == self.required
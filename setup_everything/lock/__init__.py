@@ -0,0 +1,4 @@
+from .lockfile import Lockfile, lock_from_env
+from .resolver import Resolver
+
+__all__ = ["Lockfile", "lock_from_env", "Resolver"]
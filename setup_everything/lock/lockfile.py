@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from ..download.store import SHA256_PATTERN
+from ..utils import log_error, append_github_output, atomic_write_bytes
+
+LOCKFILE_NAME = "setup-everything.lock"
+LOCKFILE_VERSION = 1
+
+
+def get_lockfile_tools_error(tools: Any) -> Optional[str]:
+    if not isinstance(tools, dict):
+        return "Field 'tools' must be a dictionary"
+
+    for tool, entry in tools.items():
+        if not isinstance(entry, dict):
+            return f"Entry for {tool} must be a dictionary"
+
+        if not isinstance(entry.get("version"), str):
+            return f"Field 'version' of {tool} must be a string"
+
+        checksums = entry.get("checksums")
+        if not isinstance(checksums, dict):
+            return f"Field 'checksums' of {tool} must be a dictionary"
+
+        for os_name, arch_checksums in checksums.items():
+            if not isinstance(arch_checksums, dict):
+                return f"Checksums of {tool} for {os_name} must be a dictionary"
+
+            for arch, sha256 in arch_checksums.items():
+                if not isinstance(sha256, str) or not SHA256_PATTERN.match(sha256):
+                    return f"Invalid SHA256 checksum of {tool} for {os_name} {arch}"
+
+    return None
+
+
+class Lockfile:
+    def __init__(self, path: Path, tools: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.path = Path(path)
+        self.tools = tools or {}
+
+    @classmethod
+    def load(cls, path: Path, missing_ok: bool = False) -> "Lockfile":
+        path = Path(path)
+
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            if missing_ok:
+                return cls(path)
+
+            log_error(f"Lockfile not found: {path}")
+            sys.exit(1)
+        except json.JSONDecodeError as e:
+            log_error(f"Invalid JSON in lockfile {path}: {e}")
+            sys.exit(1)
+
+        if not isinstance(data, dict) or data.get("version") != LOCKFILE_VERSION:
+            log_error(f"Unsupported lockfile version in {path}")
+            sys.exit(1)
+
+        tools = data.get("tools", {})
+        error = get_lockfile_tools_error(tools)
+        if error:
+            log_error(f"{error} in lockfile {path}")
+            sys.exit(1)
+
+        return cls(path, tools)
+
+    def get_entry(self, tool: str, os_name: str, arch: str) -> Optional[Dict[str, str]]:
+        entry = self.tools.get(tool)
+        if not entry:
+            return None
+
+        sha256 = entry["checksums"].get(os_name, {}).get(arch)
+        if not sha256:
+            return None
+
+        return {"tool": tool, "version": entry["version"], "sha256": sha256}
+
+    def get_entries(self, os_name: str, arch: str) -> List[Dict[str, str]]:
+        entries = []
+        for tool in sorted(self.tools):
+            entry = self.get_entry(tool, os_name, arch)
+            if not entry:
+                log_error(f"No checksum for {tool} on {os_name} {arch} in {self.path}")
+                sys.exit(1)
+
+            entries.append(entry)
+
+        return entries
+
+    def get_checksum(
+        self, tool: str, version: str, os_name: str, arch: str
+    ) -> Optional[str]:
+        entry = self.tools.get(tool)
+        if not entry or entry["version"] != version:
+            return None
+
+        return entry["checksums"].get(os_name, {}).get(arch)
+
+    def set_checksum(
+        self, tool: str, version: str, os_name: str, arch: str, sha256: str
+    ) -> None:
+        entry = self.tools.get(tool)
+        if not entry or entry["version"] != version:
+            entry = self.tools[tool] = {"version": version, "checksums": {}}
+
+        entry["checksums"].setdefault(os_name, {})[arch] = sha256
+
+    def save(self) -> None:
+        data = {
+            "version": LOCKFILE_VERSION,
+            "tools": {
+                tool: {
+                    "version": entry["version"],
+                    "checksums": {
+                        os_name: dict(sorted(checksums.items()))
+                        for os_name, checksums in sorted(entry["checksums"].items())
+                    },
+                }
+                for tool, entry in sorted(self.tools.items())
+            },
+        }
+
+        atomic_write_bytes(self.path, (json.dumps(data, indent=2) + "\n").encode())
+
+
+def lock_from_env(tool: str) -> Dict[str, str]:
+    lockfile = os.getenv("LOCKFILE", "")
+    os_name = os.getenv("OS", "")
+    arch = os.getenv("ARCH", "")
+
+    if not all([lockfile, os_name, arch]):
+        log_error("Missing required environment variables")
+        sys.exit(1)
+
+    entry = Lockfile.load(Path(lockfile)).get_entry(tool, os_name, arch)
+    if not entry:
+        log_error(f"No checksum for {tool} on {os_name} {arch} in {lockfile}")
+        sys.exit(1)
+
+    append_github_output("version", entry["version"])
+    append_github_output("sha256", entry["sha256"])
+
+    return entry
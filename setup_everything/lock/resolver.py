@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple, Set, NamedTuple
+from urllib.error import URLError, HTTPError
+
+from ..download import Downloader, DownloadError
+from ..utils import log_error, log_notice, load_manifest, Metrics
+from ..utils.common import DEFAULT_MAX_WORKERS, MIB
+from .lockfile import Lockfile, LOCKFILE_NAME
+
+GRAPHQL_BATCH_SIZE = 50
+
+Release = Tuple[str, str]
+
+
+class LockTarget(NamedTuple):
+    tool: str
+    version: str
+    os_name: str
+    arch: str
+    repo: str
+    release: str
+    filename: str
+
+
+class Resolver:
+    def __init__(
+        self,
+        manifest_dir: str = "manifests",
+        downloader: Optional[Downloader] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ):
+        self.manifest_dir = Path(manifest_dir)
+        self.downloader = downloader or Downloader.from_env(
+            os.getenv("GITHUB_TOKEN"), metrics=Metrics()
+        )
+        self.max_workers = max_workers
+
+    def load_manifest(self, tool: str):
+        manifest_path = self.manifest_dir / tool / "manifest.json"
+        if not manifest_path.is_file():
+            log_error(f"No manifest found for tool {tool}")
+            sys.exit(1)
+
+        return load_manifest(str(manifest_path))
+
+    def get_default_version(self, tool: str, lockfile: Lockfile) -> str:
+        if tool in lockfile.tools:
+            return lockfile.tools[tool]["version"]
+
+        test = self.load_manifest(tool).get("test")
+        if not test:
+            log_error(
+                f"No version given for {tool} and its manifest has no test version"
+            )
+            sys.exit(1)
+
+        return test["version"]
+
+    def get_targets(
+        self, tool: str, version: str, platforms: Optional[Set[Tuple[str, str]]]
+    ) -> List[LockTarget]:
+        manifest = self.load_manifest(tool)
+
+        targets = []
+        for os_name, assets in manifest["assets"].items():
+            for arch in assets:
+                if platforms and (os_name, arch) not in platforms:
+                    continue
+
+                repo, release, filename = self.downloader.resolve_release_asset(
+                    manifest, arch, os_name, version
+                )
+                targets.append(
+                    LockTarget(tool, version, os_name, arch, repo, release, filename)
+                )
+
+        return targets
+
+    @staticmethod
+    def build_graphql_query(releases: List[Release]) -> str:
+        fields = []
+        for i, (repo, release) in enumerate(releases):
+            owner, name = repo.split("/", 1)
+            fields.append(
+                f"r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ "
+                f"release(tagName: {json.dumps(release)}) {{ "
+                "releaseAssets(first: 100) { pageInfo { hasNextPage } nodes { name downloadUrl } } "
+                "} }"
+            )
+
+        return "query { " + " ".join(fields) + " }"
+
+    def lookup_graphql(self, releases: List[Release]) -> Dict[Release, Dict[str, str]]:
+        if not self.downloader.github_token or self.downloader.mirror_url:
+            return {}
+
+        url = f"{self.downloader.GITHUB_API_URL}/graphql"
+        headers = {
+            **self.downloader.get_auth_headers(),
+            "Content-Type": "application/json",
+        }
+
+        found = {}
+        for start in range(0, len(releases), GRAPHQL_BATCH_SIZE):
+            batch = releases[start : start + GRAPHQL_BATCH_SIZE]
+            body = json.dumps({"query": self.build_graphql_query(batch)}).encode()
+
+            try:
+                with self.downloader.metrics.time("api"):
+                    with self.downloader.http_client.request(
+                        url, headers, body
+                    ) as response:
+                        data = json.loads(response.read().decode()).get("data") or {}
+            except (HTTPError, URLError, ValueError) as e:
+                log_notice(
+                    f"GraphQL release lookup failed, falling back to the REST API: {e}"
+                )
+                return found
+
+            for i, key in enumerate(batch):
+                release = (data.get(f"r{i}") or {}).get("release")
+                if not release:
+                    continue
+
+                release_assets = release["releaseAssets"]
+                if release_assets["pageInfo"]["hasNextPage"]:
+                    continue
+
+                found[key] = {
+                    asset["name"]: asset["downloadUrl"]
+                    for asset in release_assets["nodes"]
+                }
+
+        return found
+
+    def lookup_rest(self, releases: List[Release]) -> Dict[Release, Dict[str, str]]:
+        def lookup(key: Release) -> Dict[str, str]:
+            try:
+                release_data = self.downloader.fetch_release_data(*key)
+            except DownloadError as e:
+                Downloader.exit_with_error(e)
+
+            return {
+                asset["name"]: asset["browser_download_url"]
+                for asset in release_data.get("assets", [])
+            }
+
+        workers = max(1, min(self.max_workers, len(releases)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(releases, executor.map(lookup, releases)))
+
+    def lookup_assets(self, releases: List[Release]) -> Dict[Release, Dict[str, str]]:
+        found = self.lookup_graphql(releases)
+
+        missing = [key for key in releases if key not in found]
+        if missing:
+            found.update(self.lookup_rest(missing))
+
+        return found
+
+    def hash_asset(self, url: str) -> str:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            part_file = os.path.join(temp_dir, "asset")
+
+            try:
+                sha256 = self.downloader.download_stream(
+                    url, self.downloader.get_auth_headers(), part_file
+                )
+            except HTTPError as e:
+                log_error(f"HTTP Error: {e.code} {e.reason} for {url}")
+                sys.exit(1)
+            except URLError as e:
+                log_error(f"URL Error: {e.reason} for {url}")
+                sys.exit(1)
+
+            if self.downloader.artifact_store:
+                self.downloader.artifact_store.add(sha256, part_file)
+
+        return sha256
+
+    def resolve(
+        self,
+        lockfile: Lockfile,
+        tools: List[Tuple[str, str]],
+        platforms: Optional[Set[Tuple[str, str]]] = None,
+        refresh: bool = False,
+    ) -> int:
+        targets = [
+            target
+            for tool, version in tools
+            for target in self.get_targets(tool, version, platforms)
+            if refresh
+            or not lockfile.get_checksum(tool, version, target.os_name, target.arch)
+        ]
+        if not targets:
+            return 0
+
+        releases = sorted({(target.repo, target.release) for target in targets})
+        assets = self.lookup_assets(releases)
+
+        urls = {}
+        for target in targets:
+            url = assets.get((target.repo, target.release), {}).get(target.filename)
+            if not url:
+                log_notice(
+                    f"No asset {target.filename} in {target.repo} {target.release}, "
+                    f"skipping {target.tool} on {target.os_name} {target.arch}"
+                )
+                continue
+
+            urls[target] = url
+
+        unique_urls = sorted(set(urls.values()))
+        workers = max(1, min(self.max_workers, len(unique_urls)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            checksums = dict(
+                zip(unique_urls, executor.map(self.hash_asset, unique_urls))
+            )
+
+        for target, url in urls.items():
+            lockfile.set_checksum(
+                target.tool, target.version, target.os_name, target.arch, checksums[url]
+            )
+
+        return len(unique_urls)
+
+
+def parse_tool(value: str) -> Tuple[str, Optional[str]]:
+    tool, _, version = value.partition("@")
+    return tool, version or None
+
+
+def parse_platform(value: str) -> Tuple[str, str]:
+    os_name, _, arch = value.partition("/")
+    if not os_name or not arch:
+        raise argparse.ArgumentTypeError(f"Invalid platform {value}, expected OS/ARCH")
+
+    return os_name, arch
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Resolve tool versions to release asset checksums and write them to a lockfile."
+    )
+    parser.add_argument(
+        "tools",
+        nargs="*",
+        help="Tools to lock as TOOL@VERSION, or TOOL to keep its locked or test version (default: every tool in the lockfile)",
+    )
+    parser.add_argument(
+        "--lockfile",
+        default=LOCKFILE_NAME,
+        help=f"Path of the lockfile to create or update (default: {LOCKFILE_NAME})",
+    )
+    parser.add_argument(
+        "--manifest-dir",
+        default="manifests",
+        help="Directory containing manifest files (default: manifests)",
+    )
+    parser.add_argument(
+        "--platform",
+        action="append",
+        type=parse_platform,
+        dest="platforms",
+        help="Only lock assets for this OS/ARCH, e.g. Linux/X64, can be repeated (default: every platform in the manifest)",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Download and hash assets again even if their checksum is already locked",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"Maximum number of assets to download concurrently (default: {DEFAULT_MAX_WORKERS})",
+    )
+    parser.add_argument(
+        "--github-token",
+        default=os.getenv("GITHUB_TOKEN"),
+        help="GitHub token for authentication, required for batched GraphQL lookups (default: $GITHUB_TOKEN)",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    lockfile = Lockfile.load(Path(args.lockfile), missing_ok=True)
+    metrics = Metrics()
+    resolver = Resolver(
+        args.manifest_dir,
+        Downloader.from_env(args.github_token, metrics=metrics),
+        args.max_workers,
+    )
+
+    tools = [parse_tool(value) for value in args.tools] or [
+        (tool, None) for tool in sorted(lockfile.tools)
+    ]
+    if not tools:
+        log_error("No tools given and the lockfile is empty")
+        sys.exit(1)
+
+    tools = [
+        (tool, version or resolver.get_default_version(tool, lockfile))
+        for tool, version in tools
+    ]
+
+    start = time.perf_counter()
+    hashed = resolver.resolve(
+        lockfile, tools, set(args.platforms or []) or None, args.refresh
+    )
+    seconds = time.perf_counter() - start
+
+    lockfile.save()
+
+    downloaded = metrics.counters.get("downloaded_bytes", 0) / MIB
+    print(
+        f"Locked {len(tools)} tools in {args.lockfile}: hashed {hashed} assets, "
+        f"{downloaded:.1f} MiB in {seconds:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
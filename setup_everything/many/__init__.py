@@ -0,0 +1,3 @@
+from .many import BatchSetup
+
+__all__ = ["BatchSetup"]
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Dict
+
+from ..download import Downloader
+from ..install import Installer, ToolLayout
+from ..lock import Lockfile
+from ..setup import setup_asset
+from ..utils import (
+    log_error,
+    append_github_path,
+    get_env_bool,
+    load_indexed_manifest,
+    Metrics,
+)
+from ..utils.common import DEFAULT_MAX_WORKERS
+
+
+class BatchSetup:
+    def __init__(
+        self,
+        manifest_dir: str = "manifests",
+        github_token: Optional[str] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        direct_download: Optional[bool] = None,
+        layout: Optional[ToolLayout] = None,
+    ):
+        self.manifest_dir = Path(manifest_dir)
+        self.metrics = Metrics()
+        self.downloader = Downloader.from_env(
+            github_token, direct_download, self.metrics
+        )
+        self.installer = Installer.from_env(self.metrics)
+        self.max_workers = max_workers
+        self.layout = layout
+
+    @staticmethod
+    def parse_tools(value: str) -> List[Dict[str, str]]:
+        try:
+            entries = json.loads(value)
+        except json.JSONDecodeError as e:
+            log_error(f"Invalid JSON in tools list: {e}")
+            sys.exit(1)
+
+        if not isinstance(entries, list):
+            log_error("Tools list must be a JSON array")
+            sys.exit(1)
+
+        for entry in entries:
+            if not isinstance(entry, dict):
+                log_error("Each tool entry must be an object")
+                sys.exit(1)
+
+            for field in ["tool", "version", "sha256"]:
+                if not isinstance(entry.get(field), str) or not entry[field]:
+                    log_error(f"Missing required field '{field}' in tool entry")
+                    sys.exit(1)
+
+        return entries
+
+    def get_manifest_path(self, tool: str) -> str:
+        manifest_path = self.manifest_dir / tool / "manifest.json"
+        if not manifest_path.is_file():
+            log_error(f"No manifest found for tool {tool}")
+            sys.exit(1)
+
+        return str(manifest_path)
+
+    def setup_tool(
+        self,
+        entry: Dict[str, str],
+        arch: str,
+        os_name: str,
+        download_dir: Path,
+        install_dir: str,
+    ) -> str:
+        tool = entry["tool"]
+        version = entry["version"]
+        manifest_path = self.get_manifest_path(tool)
+
+        output_file = download_dir / f"{tool}_{version}_{os_name}-{arch}"
+        filename = setup_asset(
+            self.downloader,
+            self.installer,
+            load_indexed_manifest(manifest_path),
+            arch,
+            os_name,
+            version,
+            str(output_file),
+            entry["sha256"],
+            install_dir,
+            self.layout,
+        )
+        print(f"Installed {tool} {version}")
+        self.metrics.count("tools")
+
+        return filename
+
+    def get_install_dirs(
+        self, entries: List[Dict[str, str]], install_dir: str
+    ) -> List[str]:
+        if not self.layout:
+            return [install_dir]
+
+        install_dirs = []
+        for entry in entries:
+            manifest = load_indexed_manifest(self.get_manifest_path(entry["tool"]))
+            install_dirs.append(
+                str(self.layout.get_bin_dir(manifest["name"], entry["version"]))
+            )
+
+        return install_dirs
+
+    def setup_tools(
+        self,
+        entries: List[Dict[str, str]],
+        arch: str,
+        os_name: str,
+        download_dir: str,
+        install_dir: str,
+    ) -> List[str]:
+        if not entries:
+            return []
+
+        download_path = Path(download_dir)
+        download_path.mkdir(parents=True, exist_ok=True)
+
+        workers = max(1, min(self.max_workers, len(entries)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    self.setup_tool, entry, arch, os_name, download_path, install_dir
+                )
+                for entry in entries
+            ]
+
+            return [future.result() for future in futures]
+
+
+def setup_many_from_env() -> List[str]:
+    tools = os.getenv("TOOLS", "")
+    lockfile = os.getenv("LOCKFILE", "")
+    arch = os.getenv("ARCH", "")
+    os_name = os.getenv("OS", "")
+    download_dir = os.getenv("DOWNLOAD_DIR", "")
+    install_dir = os.getenv("INSTALL_DIR", "")
+    manifest_dir = os.getenv("MANIFEST_DIR", "manifests")
+    max_workers = os.getenv("MAX_WORKERS", "")
+    github_token = os.getenv("GITHUB_TOKEN", "")
+    direct_download = get_env_bool("DIRECT_DOWNLOAD")
+
+    if not all([tools or lockfile, arch, os_name, download_dir, install_dir]):
+        log_error("Missing required environment variables")
+        sys.exit(1)
+
+    if tools:
+        entries = BatchSetup.parse_tools(tools)
+    else:
+        entries = Lockfile.load(Path(lockfile)).get_entries(os_name, arch)
+
+    batch = BatchSetup(
+        manifest_dir,
+        github_token,
+        int(max_workers) if max_workers else DEFAULT_MAX_WORKERS,
+        direct_download,
+        ToolLayout.from_env(),
+    )
+    filenames = batch.setup_tools(entries, arch, os_name, download_dir, install_dir)
+    batch.metrics.emit()
+
+    for path in batch.get_install_dirs(entries, install_dir):
+        append_github_path(path)
+    return filenames
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Download and install several GitHub release assets concurrently."
+    )
+    tools = parser.add_mutually_exclusive_group(required=True)
+    tools.add_argument(
+        "--tools",
+        help='JSON list of tools, e.g. [{"tool": "hugo", "version": "0.147.3", "sha256": "..."}]',
+    )
+    tools.add_argument(
+        "--lockfile",
+        help="Path of a setup-everything.lock file to install every tool from",
+    )
+    parser.add_argument(
+        "--arch",
+        required=True,
+        help="Target architecture (e.g., X64, X86, ARM64, ARM)",
+    )
+    parser.add_argument(
+        "--os",
+        required=True,
+        help="Target operating system (e.g., Linux, Windows, macOS)",
+    )
+    parser.add_argument(
+        "--download-dir", required=True, help="Directory to download the assets to"
+    )
+    install_dir = parser.add_mutually_exclusive_group(required=True)
+    install_dir.add_argument("--install-dir", help="Directory to install the assets")
+    install_dir.add_argument(
+        "--tools-dir",
+        help="Install each tool into TOOLS_DIR/TOOL/VERSION/bin and point TOOLS_DIR/TOOL/current at it",
+    )
+    parser.add_argument(
+        "--manifest-dir",
+        default="manifests",
+        help="Directory containing manifest files (default: manifests)",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"Maximum number of tools to set up concurrently (default: {DEFAULT_MAX_WORKERS})",
+    )
+    parser.add_argument(
+        "--github-token",
+        help="GitHub token for authentication",
+    )
+    parser.add_argument(
+        "--direct-download",
+        action=argparse.BooleanOptionalAction,
+        help="Download from the release download URL without querying the releases API first (default: manifest setting, otherwise enabled)",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    batch = BatchSetup(
+        args.manifest_dir,
+        args.github_token,
+        args.max_workers,
+        args.direct_download,
+        ToolLayout(Path(args.tools_dir)) if args.tools_dir else None,
+    )
+    if args.tools:
+        entries = BatchSetup.parse_tools(args.tools)
+    else:
+        entries = Lockfile.load(Path(args.lockfile)).get_entries(args.os, args.arch)
+
+    batch.setup_tools(
+        entries,
+        args.arch,
+        args.os,
+        args.download_dir,
+        args.install_dir,
+    )
+    batch.metrics.emit()
+
+    install_dirs = batch.get_install_dirs(entries, args.install_dir)
+    print(f"Successfully installed assets to {', '.join(install_dirs)}")
+
+    for path in install_dirs:
+        append_github_path(path)
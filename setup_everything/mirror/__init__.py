@@ -0,0 +1,3 @@
+from .mirror import Mirror, MirrorServer
+
+__all__ = ["Mirror", "MirrorServer"]
@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, Dict, Any, IO, Iterator, Tuple
+from urllib.error import URLError, HTTPError
+from urllib.parse import urlsplit
+
+from ..download import Downloader, ReleaseCache, ArtifactStore, HttpClient
+from ..download.http_client import HttpResponse
+from ..download import get_http_client
+from ..download.cache import DEFAULT_TTL
+from ..download.store import DEFAULT_MAX_BYTES
+from ..utils import get_cache_dir, atomic_write_bytes, log_notice
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_PORT = 8080
+DEFAULT_MAX_RELEASES = 4096
+
+RELEASE_PATH = re.compile(r"^/repos/([^/]+/[^/]+)/releases/tags/([^/]+)$")
+DOWNLOAD_PATH = re.compile(r"^/([^/]+/[^/]+)/releases/download/([^/]+)/([^/]+)$")
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class MirrorError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class AssetFill:
+    def __init__(self, temp_file: str, size: Optional[int]):
+        self.temp_file = temp_file
+        self.size = size
+        self.written = 0
+        self.done = False
+        self.error: Optional[MirrorError] = None
+        self.condition = threading.Condition()
+
+    def update(self, count: int) -> None:
+        with self.condition:
+            self.written += count
+            self.condition.notify_all()
+
+    def finish(self, error: Optional[MirrorError] = None) -> None:
+        with self.condition:
+            self.done = True
+            self.error = error
+            self.condition.notify_all()
+
+    def get_size(self) -> int:
+        if self.size is not None:
+            return self.size
+
+        with self.condition:
+            self.condition.wait_for(lambda: self.done)
+            if self.error:
+                raise self.error
+
+            return self.written
+
+    def wait(self, offset: int) -> int:
+        with self.condition:
+            self.condition.wait_for(lambda: self.written > offset or self.done)
+            if self.error:
+                raise self.error
+
+            if self.written <= offset:
+                raise MirrorError(
+                    HTTPStatus.BAD_GATEWAY,
+                    f"Upstream download ended at {self.written} bytes",
+                )
+
+            return self.written
+
+
+class Mirror:
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        github_token: Optional[str] = None,
+        http_client: Optional[HttpClient] = None,
+        ttl: int = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_releases: int = DEFAULT_MAX_RELEASES,
+    ):
+        self.cache_dir = Path(cache_dir or get_cache_dir() / "mirror")
+        self.github_token = github_token
+        self.http_client = http_client or get_http_client()
+        self.release_cache = ReleaseCache(self.cache_dir, ttl, max_releases)
+        self.artifact_store = ArtifactStore(self.cache_dir, max_bytes)
+        self.assets_dir = self.cache_dir / "assets"
+        self.temp_dir = self.cache_dir / "tmp"
+        self.locks: Dict[str, threading.Lock] = {}
+        self.lock_holders: Dict[str, int] = {}
+        self.fills: Dict[str, AssetFill] = {}
+        self.lock = threading.Lock()
+
+    def get_headers(self) -> Dict[str, str]:
+        if not self.github_token:
+            return {}
+
+        return {"Authorization": f"token {self.github_token}"}
+
+    @contextmanager
+    def hold_lock(self, key: str) -> Iterator[None]:
+        with self.lock:
+            key_lock = self.locks.setdefault(key, threading.Lock())
+            self.lock_holders[key] = self.lock_holders.get(key, 0) + 1
+
+        try:
+            with key_lock:
+                yield
+        finally:
+            with self.lock:
+                self.lock_holders[key] -= 1
+                if not self.lock_holders[key]:
+                    del self.lock_holders[key]
+                    del self.locks[key]
+
+    def fetch_release(self, repo: str, release: str) -> Dict[str, Any]:
+        cached = self.release_cache.load(repo, release)
+        if cached and self.release_cache.is_fresh(cached):
+            return cached["data"]
+
+        with self.hold_lock(f"release:{repo}@{release}"):
+            cached = self.release_cache.load(repo, release)
+            if cached and self.release_cache.is_fresh(cached):
+                return cached["data"]
+
+            headers = {
+                "Accept": "application/vnd.github.v3+json",
+                **self.get_headers(),
+            }
+            if cached and cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached and cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+            url = f"{Downloader.GITHUB_API_URL}/repos/{repo}/releases/tags/{release}"
+
+            try:
+                with self.http_client.request(url, headers) as response:
+                    data = json.loads(response.read().decode())
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
+            except HTTPError as e:
+                if e.code == HTTPStatus.NOT_MODIFIED and cached:
+                    data = cached["data"]
+                    etag = e.headers.get("ETag") or cached.get("etag")
+                    last_modified = e.headers.get("Last-Modified") or cached.get(
+                        "last_modified"
+                    )
+                elif cached and e.code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                    log_notice(f"Serving stale release data for {repo} {release}")
+                    return cached["data"]
+                else:
+                    raise MirrorError(e.code, f"Upstream returned {e.code} {e.reason}")
+            except URLError as e:
+                if cached:
+                    log_notice(f"Serving stale release data for {repo} {release}")
+                    return cached["data"]
+
+                raise MirrorError(
+                    HTTPStatus.BAD_GATEWAY, f"Upstream unreachable: {e.reason}"
+                )
+
+            self.release_cache.store(repo, release, data, etag, last_modified)
+            return data
+
+    def get_record_path(self, repo: str, release: str, filename: str) -> Path:
+        key = hashlib.sha256(f"{repo}@{release}/{filename}".encode()).hexdigest()
+        return self.assets_dir / f"{key}.json"
+
+    def lookup_asset(self, repo: str, release: str, filename: str) -> Optional[str]:
+        try:
+            with open(self.get_record_path(repo, release, filename), "r") as f:
+                record = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        if (record.get("repo"), record.get("release"), record.get("name")) != (
+            repo,
+            release,
+            filename,
+        ):
+            return None
+
+        return record.get("sha256")
+
+    def open_stored_asset(
+        self, repo: str, release: str, filename: str
+    ) -> Optional[IO[bytes]]:
+        digest = self.lookup_asset(repo, release, filename)
+        if not digest:
+            return None
+
+        path = self.artifact_store.get_path(digest)
+        try:
+            source = open(path, "rb")
+        except FileNotFoundError:
+            return None
+
+        os.utime(path)
+        return source
+
+    def start_fill(
+        self, key: str, repo: str, release: str, filename: str
+    ) -> Tuple[IO[bytes], AssetFill]:
+        url = f"{Downloader.GITHUB_URL}/{repo}/releases/download/{release}/{filename}"
+
+        try:
+            response = self.http_client.request(url, self.get_headers())
+        except HTTPError as e:
+            raise MirrorError(e.code, f"Upstream returned {e.code} {e.reason}")
+        except (URLError, OSError, http.client.HTTPException) as e:
+            raise MirrorError(HTTPStatus.BAD_GATEWAY, f"Upstream download failed: {e}")
+
+        try:
+            self.temp_dir.mkdir(parents=True, exist_ok=True)
+            fd, temp_file = tempfile.mkstemp(dir=self.temp_dir)
+        except BaseException:
+            response.close()
+            raise
+
+        content_length = response.headers.get("Content-Length", "")
+        fill = AssetFill(
+            temp_file, int(content_length) if content_length.isdigit() else None
+        )
+        source = open(temp_file, "rb")
+
+        with self.lock:
+            self.fills[key] = fill
+
+        threading.Thread(
+            target=self.fill_asset,
+            args=(key, repo, release, filename, response, fd, fill),
+            daemon=True,
+        ).start()
+
+        return source, fill
+
+    def fill_asset(
+        self,
+        key: str,
+        repo: str,
+        release: str,
+        filename: str,
+        response: HttpResponse,
+        fd: int,
+        fill: AssetFill,
+    ) -> None:
+        sha256_hash = hashlib.sha256()
+        error = MirrorError(HTTPStatus.BAD_GATEWAY, "Upstream download failed")
+
+        try:
+            with response, os.fdopen(fd, "wb", buffering=0) as out_file:
+                for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                    sha256_hash.update(chunk)
+                    out_file.write(chunk)
+                    fill.update(len(chunk))
+
+            if fill.size is not None and fill.written != fill.size:
+                raise OSError(f"Expected {fill.size} bytes, got {fill.written}")
+
+            digest = sha256_hash.hexdigest()
+            self.artifact_store.add(digest, fill.temp_file)
+            record = {
+                "repo": repo,
+                "release": release,
+                "name": filename,
+                "sha256": digest,
+            }
+            atomic_write_bytes(
+                self.get_record_path(repo, release, filename),
+                json.dumps(record).encode(),
+            )
+            error = None
+        except (URLError, OSError, http.client.HTTPException) as e:
+            log_notice(f"Fetching {repo} {release} {filename} failed: {e}")
+            error = MirrorError(
+                HTTPStatus.BAD_GATEWAY, f"Upstream download failed: {e}"
+            )
+        finally:
+            fill.finish(error)
+
+            with self.lock:
+                self.fills.pop(key, None)
+
+            os.remove(fill.temp_file)
+
+    def open_asset(
+        self, repo: str, release: str, filename: str
+    ) -> Tuple[IO[bytes], Optional[AssetFill]]:
+        source = self.open_stored_asset(repo, release, filename)
+        if source:
+            return source, None
+
+        key = f"{repo}@{release}/{filename}"
+        with self.hold_lock(f"asset:{key}"):
+            with self.lock:
+                fill = self.fills.get(key)
+                if fill:
+                    return open(fill.temp_file, "rb"), fill
+
+            source = self.open_stored_asset(repo, release, filename)
+            if source:
+                return source, None
+
+            log_notice(f"Fetching {repo} {release} {filename} from upstream")
+            return self.start_fill(key, repo, release, filename)
+
+
+class MirrorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "setup-everything-mirror"
+
+    def get_base_url(self) -> str:
+        if self.server.public_url:
+            return self.server.public_url
+
+        host = self.headers.get("Host") or "{}:{}".format(
+            *self.server.server_address[:2]
+        )
+        return f"http://{host}"
+
+    def send_error_response(self, status: int, message: str) -> None:
+        body = json.dumps({"message": message}).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+
+        try:
+            match = RELEASE_PATH.match(path)
+            if match:
+                return self.send_release(match.group(1), match.group(2))
+
+            match = DOWNLOAD_PATH.match(path)
+            if match:
+                return self.send_asset(match.group(1), match.group(2), match.group(3))
+
+            self.send_error_response(HTTPStatus.NOT_FOUND, "Not Found")
+        except MirrorError as e:
+            self.send_error_response(e.status, str(e))
+
+    def send_release(self, repo: str, release: str) -> None:
+        data = dict(self.server.mirror.fetch_release(repo, release))
+        base_url = self.get_base_url()
+        data["assets"] = [
+            {
+                **asset,
+                "browser_download_url": f"{base_url}/{repo}/releases/download/{release}/{asset['name']}",
+            }
+            for asset in data.get("assets", [])
+        ]
+
+        body = json.dumps(data).encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()}"'
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def get_range(self, size: int) -> Optional[Tuple[int, int]]:
+        match = RANGE_HEADER.match(self.headers.get("Range", ""))
+        if not match or not (match.group(1) or match.group(2)):
+            return None
+
+        if not match.group(1):
+            return max(size - int(match.group(2)), 0), size - 1
+
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else size - 1
+        return start, min(end, size - 1)
+
+    def send_asset(self, repo: str, release: str, filename: str) -> None:
+        source, fill = self.server.mirror.open_asset(repo, release, filename)
+
+        with source:
+            size = fill.get_size() if fill else os.fstat(source.fileno()).st_size
+            start, end = 0, size - 1
+
+            byte_range = self.get_range(size)
+            if byte_range:
+                start, end = byte_range
+                if start >= size or start > end:
+                    self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                self.send_response(HTTPStatus.OK)
+
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            self.end_headers()
+
+            if self.command == "HEAD":
+                return
+
+            self.wfile.flush()
+            if not fill:
+                self.connection.sendfile(source, start, end - start + 1)
+                return
+
+            offset = start
+            while offset <= end:
+                try:
+                    available = fill.wait(offset)
+                except MirrorError as e:
+                    log_notice(f"Closing download of {filename} at {offset} bytes: {e}")
+                    self.close_connection = True
+                    return
+
+                count = min(available, end + 1) - offset
+                self.connection.sendfile(source, offset, count)
+                offset += count
+
+
+class MirrorServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        mirror: Mirror,
+        public_url: Optional[str] = None,
+    ):
+        super().__init__(address, MirrorHandler)
+        self.mirror = mirror
+        self.public_url = public_url.rstrip("/") if public_url else None
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Serve GitHub release metadata and assets from a local pull-through cache."
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on (default: 127.0.0.1)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port to listen on (default: {DEFAULT_PORT})",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory to store release metadata and assets (default: <cache dir>/mirror)",
+    )
+    parser.add_argument(
+        "--public-url",
+        help="Base URL clients use to reach the mirror, used in asset download URLs (default: taken from the Host header)",
+    )
+    parser.add_argument(
+        "--ttl",
+        type=int,
+        default=DEFAULT_TTL,
+        help=f"Seconds release metadata is served before it is revalidated upstream (default: {DEFAULT_TTL})",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        default=DEFAULT_MAX_BYTES,
+        help="Maximum size of the asset store in bytes, least recently used assets are evicted first",
+    )
+    parser.add_argument(
+        "--github-token",
+        default=os.getenv("GITHUB_TOKEN"),
+        help="GitHub token used for upstream requests (default: $GITHUB_TOKEN)",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    mirror = Mirror(
+        Path(args.cache_dir) if args.cache_dir else None,
+        args.github_token,
+        ttl=args.ttl,
+        max_bytes=args.max_bytes,
+    )
+    server = MirrorServer((args.host, args.port), mirror, args.public_url)
+
+    host, port = server.server_address[:2]
+    print(f"Serving mirror on http://{host}:{port} from {mirror.cache_dir}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+from .prefetch import Prefetcher
+
+__all__ = ["Prefetcher"]
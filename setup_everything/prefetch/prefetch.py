@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Dict, Any, NamedTuple
+
+from ..download import Downloader, ArtifactStore, DownloadError
+from ..lock import Lockfile
+from ..many import BatchSetup
+from ..utils import (
+    log_error,
+    log_notice,
+    get_env_bool,
+    load_manifest,
+    Metrics,
+)
+from ..utils.common import DEFAULT_MAX_WORKERS, MIB
+
+
+class PrefetchTarget(NamedTuple):
+    tool: str
+    version: str
+    os_name: str
+    arch: str
+    sha256: str
+
+
+class Prefetcher:
+    def __init__(
+        self,
+        manifest_dir: str = "manifests",
+        github_token: Optional[str] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        artifact_store: Optional[ArtifactStore] = None,
+        direct_download: Optional[bool] = None,
+    ):
+        self.manifest_dir = Path(manifest_dir)
+        self.max_workers = max_workers
+        self.metrics = Metrics()
+        self.downloader = Downloader.from_env(
+            github_token, direct_download, self.metrics
+        )
+        self.downloader.artifact_store = artifact_store or ArtifactStore(
+            max_bytes=ArtifactStore.max_bytes_from_env()
+        )
+        self.artifact_store = self.downloader.artifact_store
+        self.manifests: Dict[str, Dict[str, Any]] = {}
+
+    def get_manifest(self, tool: str) -> Dict[str, Any]:
+        if tool not in self.manifests:
+            manifest_path = self.manifest_dir / tool / "manifest.json"
+            if not manifest_path.is_file():
+                log_error(f"No manifest found for tool {tool}")
+                sys.exit(1)
+
+            self.manifests[tool] = load_manifest(str(manifest_path))
+
+        return self.manifests[tool]
+
+    def get_manifest_targets(self, tools: Optional[List[str]]) -> List[PrefetchTarget]:
+        if not tools:
+            tools = sorted(
+                path.parent.name for path in self.manifest_dir.glob("*/manifest.json")
+            )
+
+        targets = []
+        for tool in tools:
+            test = self.get_manifest(tool).get("test")
+            if not test:
+                continue
+
+            for os_name, checksums in test.get("checksums", {}).items():
+                for arch, sha256 in checksums.items():
+                    targets.append(
+                        PrefetchTarget(tool, test["version"], os_name, arch, sha256)
+                    )
+
+        return targets
+
+    @staticmethod
+    def get_entry_targets(
+        entries: List[Dict[str, str]], os_name: Optional[str], arch: Optional[str]
+    ) -> List[PrefetchTarget]:
+        targets = []
+        for entry in entries:
+            entry_os = entry.get("os", os_name)
+            entry_arch = entry.get("arch", arch)
+            if not entry_os or not entry_arch:
+                log_error(
+                    f"No OS or architecture given for {entry['tool']} {entry['version']}"
+                )
+                sys.exit(1)
+
+            targets.append(
+                PrefetchTarget(
+                    entry["tool"],
+                    entry["version"],
+                    entry_os,
+                    entry_arch,
+                    entry["sha256"],
+                )
+            )
+
+        return targets
+
+    @staticmethod
+    def get_lockfile_targets(lockfile: Lockfile) -> List[PrefetchTarget]:
+        return [
+            PrefetchTarget(tool, entry["version"], os_name, arch, sha256)
+            for tool, entry in sorted(lockfile.tools.items())
+            for os_name, checksums in entry["checksums"].items()
+            for arch, sha256 in checksums.items()
+        ]
+
+    @staticmethod
+    def filter_targets(
+        targets: List[PrefetchTarget], os_name: Optional[str], arch: Optional[str]
+    ) -> List[PrefetchTarget]:
+        unique = {}
+        for target in targets:
+            if os_name and target.os_name != os_name:
+                continue
+            if arch and target.arch != arch:
+                continue
+
+            unique.setdefault(target.sha256, target)
+
+        return list(unique.values())
+
+    def prefetch_target(self, target: PrefetchTarget, download_dir: Path) -> bool:
+        description = f"{target.tool} {target.version} {target.os_name}-{target.arch}"
+
+        try:
+            stored_sha256 = Downloader.get_checksum(
+                str(self.artifact_store.get_path(target.sha256))
+            )
+        except FileNotFoundError:
+            stored_sha256 = None
+
+        if stored_sha256 == target.sha256:
+            print(f"Already cached {description}")
+            return True
+
+        if stored_sha256:
+            log_notice(
+                f"Cached copy of {description} is corrupt. Downloading it again."
+            )
+            self.artifact_store.remove(target.sha256)
+
+        output_file = download_dir / target.sha256
+
+        try:
+            self.downloader.fetch_manifest_asset(
+                self.get_manifest(target.tool),
+                target.arch,
+                target.os_name,
+                target.version,
+                str(output_file),
+                target.sha256,
+            )
+        except DownloadError as e:
+            log_error(f"Failed to prefetch {description}: {e}")
+            return False
+        finally:
+            if output_file.exists():
+                output_file.unlink()
+
+        self.metrics.count("prefetched_assets")
+        print(f"Prefetched {description}")
+        return True
+
+    def prefetch(self, targets: List[PrefetchTarget]) -> bool:
+        if not targets:
+            log_notice("Nothing to prefetch")
+            return True
+
+        self.artifact_store.store_dir.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+
+        with tempfile.TemporaryDirectory(
+            dir=self.artifact_store.store_dir.parent, prefix=".prefetch-"
+        ) as download_dir:
+            workers = max(1, min(self.max_workers, len(targets)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(
+                    executor.map(
+                        lambda target: self.prefetch_target(target, Path(download_dir)),
+                        targets,
+                    )
+                )
+
+        seconds = time.perf_counter() - start
+        downloaded = self.metrics.counters.get("downloaded_bytes", 0) / MIB
+        fetched = self.metrics.counters.get("prefetched_assets", 0)
+        failed = results.count(False)
+
+        print(
+            f"Prefetched {fetched} of {len(targets)} assets into {self.artifact_store.store_dir}: "
+            f"{downloaded:.1f} MiB in {seconds:.1f}s ({downloaded / seconds:.1f} MiB/s), "
+            f"{len(targets) - fetched - failed} already cached, {failed} failed"
+        )
+        self.metrics.emit()
+
+        return not failed
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Download and verify release assets into the local artifact store ahead of time."
+    )
+    parser.add_argument(
+        "--manifest-dir",
+        default="manifests",
+        help="Directory containing manifest files (default: manifests)",
+    )
+    parser.add_argument(
+        "--tool",
+        action="append",
+        dest="tools",
+        help="Only prefetch the test assets of this tool, can be repeated (default: all manifests)",
+    )
+    parser.add_argument(
+        "--lockfile",
+        help="Path of a setup-everything.lock file to prefetch every locked asset from instead of the manifest test assets",
+    )
+    parser.add_argument(
+        "--tools-json",
+        help='JSON list of tools to prefetch instead of the manifest test assets, e.g. [{"tool": "hugo", "version": "0.147.3", "sha256": "..."}]',
+    )
+    parser.add_argument(
+        "--os",
+        help="Only prefetch assets for this operating system (e.g., Linux, Windows, macOS)",
+    )
+    parser.add_argument(
+        "--arch",
+        help="Only prefetch assets for this architecture (e.g., X64, X86, ARM64, ARM)",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"Maximum number of assets to download concurrently (default: {DEFAULT_MAX_WORKERS})",
+    )
+    parser.add_argument(
+        "--github-token",
+        default=os.getenv("GITHUB_TOKEN"),
+        help="GitHub token for authentication (default: $GITHUB_TOKEN)",
+    )
+    parser.add_argument(
+        "--direct-download",
+        action=argparse.BooleanOptionalAction,
+        help="Download from the release download URL without querying the releases API first (default: manifest setting, otherwise enabled)",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    prefetcher = Prefetcher(
+        args.manifest_dir,
+        args.github_token,
+        args.max_workers,
+        direct_download=args.direct_download,
+    )
+
+    if args.lockfile:
+        targets = Prefetcher.get_lockfile_targets(Lockfile.load(Path(args.lockfile)))
+    elif args.tools_json:
+        targets = Prefetcher.get_entry_targets(
+            BatchSetup.parse_tools(args.tools_json), args.os, args.arch
+        )
+    else:
+        targets = prefetcher.get_manifest_targets(args.tools)
+
+    if not get_env_bool("SETUP_EVERYTHING_ARTIFACT_STORE"):
+        log_notice(
+            "Set SETUP_EVERYTHING_ARTIFACT_STORE=true on the runner for setups to use the prefetched assets"
+        )
+
+    if not prefetcher.prefetch(Prefetcher.filter_targets(targets, args.os, args.arch)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
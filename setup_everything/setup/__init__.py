@@ -0,0 +1,3 @@
+from .setup import setup_asset, setup_from_env
+
+__all__ = ["setup_asset", "setup_from_env"]
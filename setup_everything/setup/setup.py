@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+import argparse
+import sys
+import os
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from ..download import Downloader
+from ..install import Installer, ToolLayout
+from ..utils import (
+    log_error,
+    log_notice,
+    append_github_path,
+    get_env_bool,
+    load_indexed_manifest,
+    Metrics,
+)
+
+
+def setup_asset(
+    downloader: Downloader,
+    installer: Installer,
+    manifest: Dict[str, Any],
+    arch: str,
+    os_name: str,
+    version: str,
+    output_file: str,
+    expected_sha256: str,
+    install_dir: str,
+    layout: Optional[ToolLayout] = None,
+) -> str:
+    if layout:
+        with layout.lock(manifest["name"], version):
+            filename = setup_asset(
+                downloader,
+                installer,
+                manifest,
+                arch,
+                os_name,
+                version,
+                output_file,
+                expected_sha256,
+                str(layout.get_bin_dir(manifest["name"], version)),
+            )
+
+        layout.activate(manifest["name"], version)
+        return filename
+
+    filename = installer.get_installed_asset(install_dir, manifest, expected_sha256)
+    if filename:
+        log_notice(
+            f"{manifest['name']} {version} is already installed in {install_dir}. Skipping download."
+        )
+        return filename
+
+    filename = downloader.download_manifest_asset(
+        manifest, arch, os_name, version, output_file, expected_sha256
+    )
+    installer.install_asset(
+        output_file, filename, install_dir, manifest, expected_sha256
+    )
+
+    return filename
+
+
+def setup_from_env(manifest_path: str) -> str:
+    arch = os.getenv("ARCH", "")
+    os_name = os.getenv("OS", "")
+    version = os.getenv("VERSION", "")
+    output_file = os.getenv("FILE", "")
+    expected_sha256 = os.getenv("SHA256", "")
+    install_dir = os.getenv("INSTALL_DIR", "")
+    github_token = os.getenv("GITHUB_TOKEN", "")
+    direct_download = get_env_bool("DIRECT_DOWNLOAD")
+
+    if not all([arch, os_name, version, output_file, expected_sha256, install_dir]):
+        log_error("Missing required environment variables")
+        sys.exit(1)
+
+    metrics = Metrics({"tool": Path(manifest_path).parent.name, "version": version})
+    manifest = load_indexed_manifest(manifest_path)
+    layout = ToolLayout.from_env()
+    if layout:
+        install_dir = str(layout.get_bin_dir(manifest["name"], version))
+
+    filename = setup_asset(
+        Downloader.from_env(github_token, direct_download, metrics),
+        Installer.from_env(metrics),
+        manifest,
+        arch,
+        os_name,
+        version,
+        output_file,
+        expected_sha256,
+        install_dir,
+        layout,
+    )
+    metrics.emit()
+
+    append_github_path(install_dir)
+    return filename
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Download, verify and install a GitHub release asset."
+    )
+    parser.add_argument(
+        "--arch",
+        required=True,
+        help="Target architecture (e.g., X64, X86, ARM64, ARM)",
+    )
+    parser.add_argument(
+        "--os",
+        required=True,
+        help="Target operating system (e.g., Linux, Windows, macOS)",
+    )
+    parser.add_argument(
+        "--version",
+        required=True,
+        help="Version number of the release (e.g., 0.62.1)",
+    )
+    parser.add_argument("--file", required=True, help="Path to download the asset")
+    parser.add_argument(
+        "--sha256", required=True, help="Expected SHA256 checksum of the asset"
+    )
+    install_dir = parser.add_mutually_exclusive_group(required=True)
+    install_dir.add_argument("--install-dir", help="Directory to install the asset")
+    install_dir.add_argument(
+        "--tools-dir",
+        help="Install into TOOLS_DIR/TOOL/VERSION/bin and point TOOLS_DIR/TOOL/current at it",
+    )
+    parser.add_argument(
+        "--github-token",
+        help="GitHub token for authentication",
+    )
+    parser.add_argument(
+        "--manifest",
+        required=True,
+        help="Path of application manifest to use for downloading and installing the asset",
+    )
+    parser.add_argument(
+        "--direct-download",
+        action=argparse.BooleanOptionalAction,
+        help="Download from the release download URL without querying the releases API first (default: manifest setting, otherwise enabled)",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    metrics = Metrics(
+        {"tool": Path(args.manifest).parent.name, "version": args.version}
+    )
+    manifest = load_indexed_manifest(args.manifest)
+    install_dir = args.install_dir
+    layout = ToolLayout(Path(args.tools_dir)) if args.tools_dir else None
+    if layout:
+        install_dir = str(layout.get_bin_dir(manifest["name"], args.version))
+
+    setup_asset(
+        Downloader.from_env(args.github_token, args.direct_download, metrics),
+        Installer.from_env(metrics),
+        manifest,
+        args.arch,
+        args.os,
+        args.version,
+        args.file,
+        args.sha256,
+        install_dir,
+        layout,
+    )
+    metrics.emit()
+    print(f"Successfully installed asset to {install_dir}")
+
+    append_github_path(install_dir)
@@ -3,15 +3,41 @@ from .common import (
     log_notice,
     append_github_output,
     append_github_path,
+    get_env_bool,
     load_manifest,
+    get_manifest_schema_error,
     validate_manifest_schema,
 )
+from .index import (
+    build_manifest_index,
+    load_manifest_index,
+    load_indexed_manifest,
+)
+from .fs import (
+    get_cache_dir,
+    atomic_write_bytes,
+    clone_or_copy,
+    link_or_copy,
+    file_lock,
+)
+from .metrics import Metrics
 
 __all__ = [
     "log_error",
     "log_notice",
     "append_github_output",
     "append_github_path",
+    "get_env_bool",
     "load_manifest",
+    "get_manifest_schema_error",
     "validate_manifest_schema",
+    "build_manifest_index",
+    "load_manifest_index",
+    "load_indexed_manifest",
+    "get_cache_dir",
+    "atomic_write_bytes",
+    "clone_or_copy",
+    "link_or_copy",
+    "file_lock",
+    "Metrics",
 ]
@@ -3,7 +3,10 @@
 import os
 import json
 import sys
-from typing import Dict, Any
+from typing import Optional, Dict, Any
+
+DEFAULT_MAX_WORKERS = 8
+MIB = 1024 * 1024
 
 
 def log_notice(message: str) -> None:
@@ -24,6 +27,21 @@ def log_error(message: str) -> None:
     print(f"::error::{message}")
 
 
+def get_env_bool(name: str) -> Optional[bool]:
+    value = os.getenv(name, "").strip().lower()
+    if not value:
+        return None
+
+    if value in ("1", "true", "yes", "on"):
+        return True
+
+    if value in ("0", "false", "no", "off"):
+        return False
+
+    log_error(f"Invalid boolean value for {name}: {value}")
+    sys.exit(1)
+
+
 def append_github_output(name: str, value: str) -> None:
     github_output = os.getenv("GITHUB_OUTPUT")
     if not github_output:
@@ -42,39 +60,48 @@ def append_github_path(path: str) -> None:
         f.write(f"{path}\n")
 
 
-def validate_manifest_schema(manifest: Dict[str, Any]) -> None:
+def get_manifest_schema_error(manifest: Dict[str, Any]) -> Optional[str]:
     required_fields = ["repo", "assets"]
 
     for field in required_fields:
         if field not in manifest:
-            log_error(f"Missing required field '{field}' in manifest")
-            sys.exit(1)
+            return f"Missing required field '{field}' in manifest"
 
     if not isinstance(manifest["repo"], str):
-        log_error("Field 'repo' must be a string")
-        sys.exit(1)
+        return "Field 'repo' must be a string"
 
-    if not isinstance(manifest["release_pattern"], str):
-        log_error("Field 'release_pattern' must be a string")
-        sys.exit(1)
+    if "release_pattern" in manifest and not isinstance(
+        manifest["release_pattern"], str
+    ):
+        return "Field 'release_pattern' must be a string"
 
     if not isinstance(manifest["assets"], dict):
-        log_error("Field 'assets' must be a dictionary")
-        sys.exit(1)
+        return "Field 'assets' must be a dictionary"
 
     if "mappings" in manifest and not isinstance(manifest["mappings"], dict):
-        log_error("Field 'mappings' must be a dictionary")
-        sys.exit(1)
+        return "Field 'mappings' must be a dictionary"
+
+    if "direct_download" in manifest and not isinstance(
+        manifest["direct_download"], bool
+    ):
+        return "Field 'direct_download' must be a boolean"
 
     if "extract_patterns" in manifest:
         if not isinstance(manifest["extract_patterns"], list):
-            log_error("Field 'extract_patterns' must be a list")
-            sys.exit(1)
+            return "Field 'extract_patterns' must be a list"
 
         for pattern in manifest["extract_patterns"]:
             if not isinstance(pattern, str):
-                log_error("All extract patterns must be strings")
-                sys.exit(1)
+                return "All extract patterns must be strings"
+
+    return None
+
+
+def validate_manifest_schema(manifest: Dict[str, Any]) -> None:
+    error = get_manifest_schema_error(manifest)
+    if error:
+        log_error(error)
+        sys.exit(1)
 
 
 def load_manifest(manifest_path: str) -> Dict[str, Any]:
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+COPY_BUFFER_SIZE = 1024 * 1024
+FICLONE = 0x40049409
+
+
+def get_cache_dir() -> Path:
+    cache_dir = os.getenv("SETUP_EVERYTHING_CACHE_DIR")
+    if cache_dir:
+        return Path(cache_dir)
+
+    xdg_cache_home = os.getenv("XDG_CACHE_HOME")
+    if xdg_cache_home:
+        return Path(xdg_cache_home) / "setup-everything"
+
+    return Path.home() / ".cache" / "setup-everything"
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, temp_file = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+        os.replace(temp_file, path)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+def clone_file(source_fd: int, destination_fd: int) -> bool:
+    if sys.platform != "linux":
+        return False
+
+    import fcntl
+
+    try:
+        fcntl.ioctl(destination_fd, FICLONE, source_fd)
+    except OSError:
+        return False
+
+    return True
+
+
+def copy_file_data(source_fd: int, destination_fd: int) -> int:
+    size = os.fstat(source_fd).st_size
+    if clone_file(source_fd, destination_fd):
+        return size
+
+    offset = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while offset < size:
+                copied = os.copy_file_range(
+                    source_fd, destination_fd, size - offset, offset, offset
+                )
+                if not copied:
+                    break
+                offset += copied
+        except OSError:
+            pass
+
+    os.lseek(source_fd, offset, os.SEEK_SET)
+    os.lseek(destination_fd, offset, os.SEEK_SET)
+    with (
+        open(source_fd, "rb", closefd=False) as source,
+        open(destination_fd, "wb", closefd=False) as destination,
+    ):
+        shutil.copyfileobj(source, destination, COPY_BUFFER_SIZE)
+        return destination.tell()
+
+
+def clone_or_copy(source: Path, destination: Path) -> int:
+    with open(source, "rb") as source_file, open(destination, "wb") as out_file:
+        return copy_file_data(source_file.fileno(), out_file.fileno())
+
+
+def link_or_copy(source: Path, destination: Path) -> None:
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = destination.with_name(f".{destination.name}.{os.getpid()}.tmp")
+
+    try:
+        try:
+            os.link(source, temp_file)
+        except OSError:
+            clone_or_copy(source, temp_file)
+
+        os.replace(temp_file, destination)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
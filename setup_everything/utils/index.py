@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import os
+from typing import Optional, Dict, Any
+
+from .common import load_manifest
+
+INDEX_FILENAME = "index.json"
+INDEX_VERSION = 2
+INDEX_FIELDS = [
+    "name",
+    "repo",
+    "release_pattern",
+    "direct_download",
+    "assets",
+    "extract_patterns",
+]
+
+_indexes: Dict[str, Optional[Dict[str, Any]]] = {}
+_digests: Dict[str, str] = {}
+
+
+def build_manifest_index(
+    manifests: Dict[str, Dict[str, Any]], sources: Dict[str, bytes]
+) -> Dict[str, Any]:
+    return {
+        "version": INDEX_VERSION,
+        "tools": {
+            tool_name: {
+                field: manifest[field] for field in INDEX_FIELDS if field in manifest
+            }
+            for tool_name, manifest in sorted(manifests.items())
+        },
+        "digests": {
+            tool_name: hashlib.sha256(source).hexdigest()
+            for tool_name, source in sorted(sources.items())
+        },
+    }
+
+
+def get_manifest_digest(manifest_path: str) -> Optional[str]:
+    if manifest_path not in _digests:
+        try:
+            with open(manifest_path, "rb") as f:
+                _digests[manifest_path] = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    return _digests[manifest_path]
+
+
+def load_manifest_index(index_path: str) -> Optional[Dict[str, Any]]:
+    index_path = os.fspath(index_path)
+    if index_path not in _indexes:
+        try:
+            with open(index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            index = None
+
+        if index and index.get("version") != INDEX_VERSION:
+            index = None
+
+        _indexes[index_path] = index
+
+    return _indexes[index_path]
+
+
+def load_indexed_manifest(manifest_path: str) -> Dict[str, Any]:
+    tool_dir = os.path.dirname(manifest_path)
+    index = load_manifest_index(os.path.join(os.path.dirname(tool_dir), INDEX_FILENAME))
+
+    if index:
+        tool_name = os.path.basename(tool_dir)
+        manifest = index["tools"].get(tool_name)
+        if manifest and index["digests"].get(tool_name) == get_manifest_digest(
+            manifest_path
+        ):
+            return manifest
+
+    return load_manifest(manifest_path)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator
+
+from .common import append_github_output
+from .fs import atomic_write_bytes
+
+METRIC_PREFIX = "setup_everything"
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    def __init__(self, labels: Optional[Dict[str, str]] = None):
+        self.labels = dict(labels or {})
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.started = time.perf_counter()
+        self.offset = 0.0
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def get_stack(self):
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        stack = self.get_stack()
+        if stack:
+            stack[-1] += seconds
+
+        with self.lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def time(self, phase: str) -> Iterator[None]:
+        stack = self.get_stack()
+        stack.append(0.0)
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            self.add_time(phase, elapsed - nested)
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, summary: Dict[str, Any]) -> None:
+        with self.lock:
+            for name, value in summary.items():
+                if isinstance(value, str):
+                    self.labels.setdefault(name, value)
+
+            self.offset += summary.get("seconds", 0.0)
+            for phase, seconds in summary.get("phases", {}).items():
+                self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+            for name, value in summary.get("counters", {}).items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                **self.labels,
+                "seconds": round(self.offset + time.perf_counter() - self.started, 6),
+                "phases": {
+                    phase: round(seconds, 6)
+                    for phase, seconds in sorted(self.phases.items())
+                },
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def format_labels(self, **extra: str) -> str:
+        labels = {**self.labels, **extra}
+        if not labels:
+            return ""
+
+        values = ",".join(
+            f'{name}="{escape_label_value(value)}"' for name, value in labels.items()
+        )
+        return f"{{{values}}}"
+
+    def to_openmetrics(self, summary: Optional[Dict[str, Any]] = None) -> str:
+        summary = summary or self.to_dict()
+        lines = [
+            f"# TYPE {METRIC_PREFIX}_seconds gauge",
+            f"# UNIT {METRIC_PREFIX}_seconds seconds",
+            f"{METRIC_PREFIX}_seconds{self.format_labels()} {summary['seconds']}",
+            f"# TYPE {METRIC_PREFIX}_phase_seconds gauge",
+            f"# UNIT {METRIC_PREFIX}_phase_seconds seconds",
+        ]
+
+        for phase, seconds in summary["phases"].items():
+            lines.append(
+                f"{METRIC_PREFIX}_phase_seconds{self.format_labels(phase=phase)} {seconds}"
+            )
+
+        for name, value in summary["counters"].items():
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            lines.append(f"{METRIC_PREFIX}_{name}{self.format_labels()} {value}")
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def emit(self) -> Dict[str, Any]:
+        summary = self.to_dict()
+        encoded = json.dumps(summary, separators=(",", ":"))
+
+        print(f"Metrics: {encoded}")
+        append_github_output("metrics", encoded)
+
+        metrics_file = os.getenv("SETUP_EVERYTHING_METRICS_FILE")
+        if metrics_file:
+            atomic_write_bytes(
+                Path(metrics_file), (json.dumps(summary, indent=2) + "\n").encode()
+            )
+
+        openmetrics_file = os.getenv("SETUP_EVERYTHING_OPENMETRICS_FILE")
+        if openmetrics_file:
+            atomic_write_bytes(
+                Path(openmetrics_file), self.to_openmetrics(summary).encode()
+            )
+
+        return summary
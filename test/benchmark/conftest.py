@@ -0,0 +1,173 @@
+import json
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from server import ReleaseServer  # noqa: E402
+from setup_everything.download import Downloader  # noqa: E402
+
+MIB = 1024 * 1024
+
+RESULTS_KEY = pytest.StashKey[List[Dict[str, Any]]]()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark")
+    group.addoption(
+        "--bench-size",
+        type=int,
+        default=16,
+        help="Size of the synthetic binary in MiB (default: 16)",
+    )
+    group.addoption(
+        "--bench-members",
+        type=int,
+        default=1000,
+        help="Number of small members in the many-members archives (default: 1000)",
+    )
+    group.addoption(
+        "--bench-rounds",
+        type=int,
+        default=3,
+        help="Number of runs per benchmark, the fastest is reported (default: 3)",
+    )
+    group.addoption(
+        "--bench-json",
+        help="Write the benchmark results to this file as JSON",
+    )
+
+
+def pytest_configure(config):
+    config.stash[RESULTS_KEY] = []
+
+
+def read_io_counters() -> Dict[str, int]:
+    try:
+        with open("/proc/self/io") as f:
+            return {
+                name: int(value)
+                for name, value in (line.split(": ") for line in f.read().splitlines())
+            }
+    except OSError:
+        return {}
+
+
+def reset_peak_rss() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def get_peak_rss(reset: bool) -> int:
+    if reset:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Benchmark:
+    def __init__(self, request: pytest.FixtureRequest):
+        self.request = request
+        self.rounds = request.config.getoption("--bench-rounds")
+
+    def __call__(
+        self,
+        func: Callable[[Path], Any],
+        tmp_path: Path,
+        nbytes: int,
+        setup: Optional[Callable[[Path], Any]] = None,
+    ) -> Dict[str, Any]:
+        best = None
+
+        for round_number in range(self.rounds):
+            work_dir = tmp_path / f"round-{round_number}"
+            work_dir.mkdir()
+            if setup:
+                setup(work_dir)
+
+            reset = reset_peak_rss()
+            before = read_io_counters()
+            start = time.perf_counter()
+
+            func(work_dir)
+
+            seconds = time.perf_counter() - start
+            after = read_io_counters()
+
+            result = {
+                "seconds": seconds,
+                "peak_rss": get_peak_rss(reset),
+                "read_syscalls": after.get("syscr", 0) - before.get("syscr", 0),
+                "write_syscalls": after.get("syscw", 0) - before.get("syscw", 0),
+            }
+            if best is None or seconds < best["seconds"]:
+                best = result
+
+        best["name"] = self.request.node.name
+        best["bytes"] = nbytes
+        best["throughput"] = nbytes / best["seconds"] / MIB
+        self.request.config.stash[RESULTS_KEY].append(best)
+
+        return best
+
+
+@pytest.fixture
+def benchmark(request) -> Benchmark:
+    return Benchmark(request)
+
+
+@pytest.fixture(scope="session")
+def release_root(tmp_path_factory) -> Path:
+    return tmp_path_factory.mktemp("releases")
+
+
+@pytest.fixture(scope="session")
+def release_server(release_root):
+    server = ReleaseServer(release_root).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def github(monkeypatch, release_server) -> ReleaseServer:
+    monkeypatch.setattr(Downloader, "GITHUB_URL", release_server.url)
+    monkeypatch.setattr(Downloader, "GITHUB_API_URL", f"{release_server.url}/api")
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    monkeypatch.delenv("GITHUB_OUTPUT", raising=False)
+    monkeypatch.delenv("GITHUB_PATH", raising=False)
+    return release_server
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = config.stash[RESULTS_KEY]
+    if not results:
+        return
+
+    terminalreporter.section("benchmark")
+    terminalreporter.write_line(
+        f"{'Name':<48} {'MiB':>7} {'Seconds':>8} {'MiB/s':>8} {'Peak RSS':>9} {'Reads':>7} {'Writes':>7}"
+    )
+    for result in results:
+        terminalreporter.write_line(
+            f"{result['name']:<48} {result['bytes'] / MIB:>7.1f} {result['seconds']:>8.3f} "
+            f"{result['throughput']:>8.1f} {result['peak_rss'] / MIB:>8.1f}M "
+            f"{result['read_syscalls']:>7} {result['write_syscalls']:>7}"
+        )
+
+    bench_json = config.getoption("--bench-json")
+    if bench_json:
+        with open(bench_json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+import argparse
+import io
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from setup_everything.install import Installer  # noqa: E402
+from setup_everything.install.decompress import find_decompressor  # noqa: E402
+
+FORMATS = {
+    "tar.gz": "w:gz",
+    "tar.xz": "w:xz",
+    "tar.bz2": "w:bz2",
+    "tar.zst": None,
+}
+
+
+def generate_binary(size: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    blocks = [rng.randbytes(4096) for _ in range(64)]
+    data = io.BytesIO()
+
+    while data.tell() < size:
+        if rng.random() < 0.3:
+            data.write(rng.randbytes(4096))
+        else:
+            data.write(rng.choice(blocks))
+
+    return data.getvalue()[:size]
+
+
+def add_members(tar_ref: tarfile.TarFile, payload: bytes) -> None:
+    info = tarfile.TarInfo("tool/LICENSE")
+    info.size = 4
+    tar_ref.addfile(info, io.BytesIO(b"MIT\n"))
+
+    info = tarfile.TarInfo("tool/tool")
+    info.size = len(payload)
+    info.mode = 0o755
+    tar_ref.addfile(info, io.BytesIO(payload))
+
+
+def build_archive(work_dir: Path, extension: str, payload: bytes) -> Path:
+    archive_path = work_dir / f"asset.{extension}"
+    mode = FORMATS[extension]
+
+    if mode:
+        with tarfile.open(archive_path, mode) as tar_ref:
+            add_members(tar_ref, payload)
+    else:
+        tar_path = work_dir / "asset.tar"
+        with tarfile.open(tar_path, "w") as tar_ref:
+            add_members(tar_ref, payload)
+
+        subprocess.run(
+            ["zstd", "-q", "-f", "--rm", str(tar_path), "-o", str(archive_path)],
+            check=True,
+        )
+
+    return archive_path
+
+
+def time_install(archive_path: Path, install_dir: Path, external: bool) -> float:
+    installer = Installer(external_decompressors=external)
+    manifest = {"extract_patterns": ["tool"]}
+
+    start = time.perf_counter()
+    installer.install_asset(archive_path, archive_path.name, install_dir, manifest)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare tar decompression backends used by Installer."
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=200,
+        help="Size of the synthetic binary in MiB (default: 200)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of runs per backend, the fastest is reported (default: 3)",
+    )
+
+    args = parser.parse_args()
+
+    payload = generate_binary(args.size * 1024 * 1024)
+
+    print(f"{'Format':<10} {'Backend':<20} {'Seconds':>8} {'MiB/s':>8}")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = Path(temp_dir)
+
+        for extension in FORMATS:
+            if FORMATS[extension] is None and not shutil.which("zstd"):
+                continue
+
+            archive_path = build_archive(work_dir, extension, payload)
+            command = find_decompressor(extension.removeprefix("tar."))
+
+            backends = [("stdlib", False)]
+            if command:
+                backends.insert(
+                    0, (" ".join([Path(command[0]).name, *command[1:]]), True)
+                )
+            if FORMATS[extension] is None:
+                backends = [b for b in backends if b[1]]
+
+            for backend, external in backends:
+                best = min(
+                    time_install(archive_path, work_dir / "bin", external)
+                    for _ in range(args.repeat)
+                )
+                print(
+                    f"{extension:<10} {backend:<20} {best:>8.3f} {args.size / best:>8.1f}"
+                )
+
+            os.remove(archive_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import json
+import multiprocessing
+import os
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+RELEASE_PATH = re.compile(r"^/api/repos/([^/]+/[^/]+)/releases/tags/([^/]+)$")
+DOWNLOAD_PATH = re.compile(r"^/([^/]+/[^/]+)/releases/download/([^/]+)/([^/]+)$")
+ASSET_PATH = re.compile(r"^/assets/([^/]+)/([^/]+)$")
+RANGE_HEADER = re.compile(r"^bytes=(\d+)-(\d*)$")
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class ReleaseHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def get_base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def get_release_dir(self, tag: str) -> Optional[Path]:
+        release_dir = Path(self.server.root) / tag
+        if not release_dir.is_dir():
+            return None
+        return release_dir
+
+    def send_empty(self, status: int, headers=None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        match = RELEASE_PATH.match(self.path)
+        if match:
+            return self.send_release(match.group(1), match.group(2))
+
+        match = DOWNLOAD_PATH.match(self.path)
+        if match:
+            release_dir = self.get_release_dir(match.group(2))
+            if not release_dir or not (release_dir / match.group(3)).is_file():
+                return self.send_empty(404)
+
+            location = f"/assets/{match.group(2)}/{match.group(3)}"
+            return self.send_empty(302, {"Location": location})
+
+        match = ASSET_PATH.match(self.path)
+        if match:
+            return self.send_asset(match.group(1), match.group(2))
+
+        self.send_empty(404)
+
+    def send_release(self, repo: str, tag: str) -> None:
+        release_dir = self.get_release_dir(tag)
+        if not release_dir:
+            return self.send_empty(404)
+
+        assets = [
+            {
+                "name": path.name,
+                "size": path.stat().st_size,
+                "browser_download_url": f"{self.get_base_url()}/{repo}/releases/download/{tag}/{path.name}",
+            }
+            for path in sorted(release_dir.iterdir())
+        ]
+        body = json.dumps({"tag_name": tag, "assets": assets}).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_asset(self, tag: str, name: str) -> None:
+        release_dir = self.get_release_dir(tag)
+        if not release_dir or not (release_dir / name).is_file():
+            return self.send_empty(404)
+
+        path = release_dir / name
+        size = path.stat().st_size
+        start, end = 0, size - 1
+
+        match = RANGE_HEADER.match(self.headers.get("Range", ""))
+        if match and not self.server.ignore_ranges:
+            start = int(match.group(1))
+            if match.group(2):
+                end = min(int(match.group(2)), size - 1)
+            if start >= size:
+                return self.send_empty(416, {"Content-Range": f"bytes */{size}"})
+
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(COPY_BUFFER_SIZE, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+
+def serve(root: str, ready, ignore_ranges: bool = False) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ReleaseHandler)
+    server.daemon_threads = True
+    server.root = root
+    server.ignore_ranges = ignore_ranges
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+class ReleaseServer:
+    def __init__(self, root: os.PathLike, ignore_ranges: bool = False):
+        self.root = str(root)
+        self.ignore_ranges = ignore_ranges
+        self.process = None
+        self.port = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "ReleaseServer":
+        ready = multiprocessing.Queue()
+        self.process = multiprocessing.Process(
+            target=serve, args=(self.root, ready, self.ignore_ranges), daemon=True
+        )
+        self.process.start()
+        self.port = ready.get(timeout=30)
+        return self
+
+    def stop(self) -> None:
+        if self.process:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
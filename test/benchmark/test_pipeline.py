@@ -0,0 +1,264 @@
+import hashlib
+import io
+import os
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from decompress import generate_binary
+from setup_everything.download import Downloader, HttpClient, RetryPolicy
+from setup_everything.install import Installer
+from setup_everything.install.members import MemberStore
+from setup_everything.setup import setup_asset
+
+VERSION = "1.0.0"
+RELEASE = f"v{VERSION}"
+
+FORMATS = ["zip", "tar.gz", "tar.xz"]
+BINARY = f"tool-{VERSION}-linux"
+SHAPES = ["single", "many"]
+
+SMALL_MEMBER_SIZE = 4096
+
+
+def iter_members(shape: str, payload: bytes, members: int):
+    yield "tool/tool", payload, 0o755
+
+    if shape == "many":
+        for i in range(members):
+            yield f"tool/share/doc/{i:05}.txt", payload[:SMALL_MEMBER_SIZE], 0o644
+
+
+def build_archive(path: Path, extension: str, shape: str, payload: bytes, members: int):
+    if extension == "zip":
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zip_ref:
+            for name, data, _ in iter_members(shape, payload, members):
+                zip_ref.writestr(name, data)
+        return
+
+    with tarfile.open(path, f"w:{extension.removeprefix('tar.')}") as tar_ref:
+        for name, data, mode in iter_members(shape, payload, members):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mode = mode
+            tar_ref.addfile(info, io.BytesIO(data))
+
+
+@pytest.fixture(scope="session")
+def payload(request) -> bytes:
+    return generate_binary(request.config.getoption("--bench-size") * 1024 * 1024)
+
+
+@pytest.fixture(scope="session")
+def assets(request, release_root, payload):
+    release_dir = release_root / RELEASE
+    release_dir.mkdir()
+    members = request.config.getoption("--bench-members")
+
+    checksums = {}
+    for extension in FORMATS:
+        for shape in SHAPES:
+            path = release_dir / f"tool-{VERSION}-{shape}.{extension}"
+            build_archive(path, extension, shape, payload, members)
+            checksums[path.name] = hashlib.sha256(path.read_bytes()).hexdigest()
+
+    (release_dir / BINARY).write_bytes(payload)
+    checksums[BINARY] = hashlib.sha256(payload).hexdigest()
+
+    return checksums
+
+
+def get_manifest(filename: str, direct_download: bool):
+    return {
+        "name": "tool",
+        "repo": "acme/tool",
+        "assets": {"linux": {"x64": filename}},
+        "extract_patterns": ["tool"],
+        "direct_download": direct_download,
+    }
+
+
+def get_downloader(segments: int = 1) -> Downloader:
+    return Downloader(
+        http_client=HttpClient(retry_policy=RetryPolicy(max_attempts=1)),
+        segments=segments,
+    )
+
+
+def run_pipeline(downloader, installer, manifest, sha, work_dir: Path) -> Path:
+    output_file = work_dir / manifest["assets"]["linux"]["x64"]
+    install_dir = work_dir / "bin"
+
+    filename = downloader.download_manifest_asset(
+        manifest, "x64", "linux", VERSION, str(output_file), sha
+    )
+    installer.install_asset(output_file, filename, install_dir, manifest)
+
+    return install_dir / "tool"
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("extension", FORMATS)
+def test_download_and_install(
+    benchmark, github, assets, payload, tmp_path, extension, shape
+):
+    filename = f"tool-{VERSION}-{shape}.{extension}"
+    manifest = get_manifest(filename, True)
+    downloader = get_downloader()
+    installer = Installer()
+
+    result = benchmark(
+        lambda work_dir: run_pipeline(
+            downloader, installer, manifest, assets[filename], work_dir
+        ),
+        tmp_path,
+        len(payload),
+    )
+
+    installed = tmp_path / "round-0" / "bin" / "tool"
+    assert installed.read_bytes() == payload
+    assert result["throughput"] > 0
+
+
+@pytest.mark.parametrize("direct_download", [True, False], ids=["direct", "api"])
+def test_download(benchmark, github, assets, tmp_path, direct_download):
+    filename = f"tool-{VERSION}-single.tar.gz"
+    manifest = get_manifest(filename, direct_download)
+    downloader = get_downloader()
+    size = Path(github.root, RELEASE, filename).stat().st_size
+
+    benchmark(
+        lambda work_dir: downloader.download_manifest_asset(
+            manifest,
+            "x64",
+            "linux",
+            VERSION,
+            str(work_dir / filename),
+            assets[filename],
+        ),
+        tmp_path,
+        size,
+    )
+
+    assert (tmp_path / "round-0" / filename).stat().st_size == size
+
+
+@pytest.mark.parametrize("segments", [1, 4])
+def test_download_segments(benchmark, github, assets, tmp_path, segments):
+    filename = f"tool-{VERSION}-single.zip"
+    manifest = get_manifest(filename, True)
+    downloader = get_downloader(segments)
+    size = Path(github.root, RELEASE, filename).stat().st_size
+
+    benchmark(
+        lambda work_dir: downloader.download_manifest_asset(
+            manifest,
+            "x64",
+            "linux",
+            VERSION,
+            str(work_dir / filename),
+            assets[filename],
+        ),
+        tmp_path,
+        size,
+    )
+
+    assert (tmp_path / "round-0" / filename).stat().st_size == size
+
+
+@pytest.mark.parametrize("extension", FORMATS)
+def test_install(benchmark, github, assets, payload, tmp_path, extension):
+    filename = f"tool-{VERSION}-many.{extension}"
+    manifest = get_manifest(filename, True)
+    installer = Installer()
+    archive = Path(github.root, RELEASE, filename)
+
+    benchmark(
+        lambda work_dir: installer.install_asset(
+            archive, filename, work_dir / "bin", manifest
+        ),
+        tmp_path,
+        len(payload),
+    )
+
+    assert (tmp_path / "round-0" / "bin" / "tool").read_bytes() == payload
+
+
+@pytest.mark.parametrize("extension", FORMATS)
+def test_install_reused(benchmark, github, assets, payload, tmp_path, extension):
+    filename = f"tool-{VERSION}-many.{extension}"
+    manifest = {**get_manifest(filename, True), "extract_patterns": ["tool", "*.txt"]}
+    installer = Installer(member_store=MemberStore(tmp_path / "cache"))
+    archive = Path(github.root, RELEASE, filename)
+
+    benchmark(
+        lambda work_dir: installer.install_asset(
+            archive, filename, work_dir / "bin", manifest
+        ),
+        tmp_path,
+        len(payload),
+        setup=lambda work_dir: installer.install_asset(
+            archive, filename, work_dir / "previous", manifest
+        ),
+    )
+
+    installed = tmp_path / "round-0" / "bin" / "tool"
+    assert installed.read_bytes() == payload
+    assert installed.stat().st_nlink > 1
+
+
+def test_checksum(benchmark, github, assets, payload, tmp_path):
+    binary = str(Path(github.root, RELEASE, BINARY))
+
+    benchmark(lambda work_dir: Downloader.get_checksum(binary), tmp_path, len(payload))
+
+    assert Downloader.get_checksum(binary) == assets[BINARY]
+
+
+@pytest.mark.parametrize("shared", [False, True], ids=["exclusive", "shared"])
+def test_install_binary(benchmark, github, assets, payload, tmp_path, shared):
+    manifest = get_manifest(BINARY, True)
+    installer = Installer()
+    binary = Path(github.root, RELEASE, BINARY)
+
+    def copy_asset(work_dir: Path) -> None:
+        (work_dir / "tool").write_bytes(binary.read_bytes())
+        if shared:
+            os.link(work_dir / "tool", work_dir / "tool.stored")
+
+    benchmark(
+        lambda work_dir: installer.install_asset(
+            work_dir / "tool", BINARY, work_dir / "bin", manifest
+        ),
+        tmp_path,
+        len(payload),
+        setup=copy_asset,
+    )
+
+    assert (tmp_path / "round-0" / "bin" / "tool").read_bytes() == payload
+
+
+def test_setup_already_installed(benchmark, github, assets, payload, tmp_path):
+    filename = f"tool-{VERSION}-many.tar.xz"
+    manifest = get_manifest(filename, True)
+    downloader = get_downloader()
+    installer = Installer()
+
+    def run_setup(work_dir: Path) -> str:
+        return setup_asset(
+            downloader,
+            installer,
+            manifest,
+            "x64",
+            "linux",
+            VERSION,
+            str(work_dir / filename),
+            assets[filename],
+            str(work_dir / "bin"),
+        )
+
+    benchmark(run_setup, tmp_path, len(payload), setup=run_setup)
+
+    assert (tmp_path / "round-0" / "bin" / "tool").read_bytes() == payload
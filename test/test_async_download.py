@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmark"))
+
+from server import ReleaseServer  # noqa: E402
+from setup_everything.download import (  # noqa: E402
+    AsyncDownloader,
+    AsyncHttpClient,
+    ChecksumMismatchError,
+    DigestMismatchError,
+    ReleaseIndex,
+    ReleaseNotFoundError,
+)
+from setup_everything.download.base import BaseDownloader  # noqa: E402
+from setup_everything.download.retry import RetryPolicy  # noqa: E402
+
+RELEASE = "v1.0.0"
+ASSET = "tool"
+DATA = os.urandom(300 * 1024)
+SHA256 = hashlib.sha256(DATA).hexdigest()
+MANIFEST = {
+    "repo": "owner/tool",
+    "assets": {"Linux": {"X64": ASSET}},
+}
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    root = tmp_path_factory.mktemp("releases")
+    (root / RELEASE).mkdir()
+    (root / RELEASE / ASSET).write_bytes(DATA)
+
+    server = ReleaseServer(root).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def github(monkeypatch, server):
+    monkeypatch.setattr(BaseDownloader, "GITHUB_URL", server.url)
+    monkeypatch.setattr(BaseDownloader, "GITHUB_API_URL", f"{server.url}/api")
+    return server
+
+
+def download(
+    output_file, sha256, direct_download=True, version="1.0.0", release_index=None
+):
+    async def run():
+        async with AsyncDownloader(
+            direct_download=direct_download,
+            http_client=AsyncHttpClient(retry_policy=RetryPolicy(max_attempts=1)),
+            release_index=release_index,
+        ) as downloader:
+            return await downloader.download_manifest_asset(
+                MANIFEST, "X64", "Linux", version, str(output_file), sha256
+            )
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("direct_download", [True, False], ids=["direct", "api"])
+def test_download_manifest_asset(github, tmp_path, direct_download):
+    output_file = tmp_path / ASSET
+    (tmp_path / f"{ASSET}.part").write_bytes(DATA[:100000])
+
+    assert download(output_file, SHA256, direct_download) == ASSET
+    assert output_file.read_bytes() == DATA
+    assert not (tmp_path / f"{ASSET}.part").exists()
+
+
+def test_download_manifest_asset_errors(github, tmp_path):
+    output_file = tmp_path / ASSET
+
+    with pytest.raises(ChecksumMismatchError):
+        download(output_file, "0" * 64)
+
+    assert not output_file.exists()
+    assert not (tmp_path / f"{ASSET}.part").exists()
+
+    with pytest.raises(ReleaseNotFoundError):
+        download(output_file, SHA256, False, "2.0.0")
+
+
+@pytest.mark.parametrize("digest", [SHA256, "0" * 64], ids=["match", "mismatch"])
+def test_download_indexed_asset(github, tmp_path, digest):
+    release_index = ReleaseIndex(tmp_path / "cache")
+    asset = {
+        "url": f"{github.url}/assets/{RELEASE}/{ASSET}",
+        "size": len(DATA),
+        "digest": f"sha256:{digest}",
+    }
+    release_index.store("owner/tool", {RELEASE: {ASSET: asset}})
+    output_file = tmp_path / ASSET
+
+    if digest != SHA256:
+        with pytest.raises(DigestMismatchError):
+            download(output_file, SHA256, False, release_index=release_index)
+        return
+
+    assert download(output_file, SHA256, False, release_index=release_index) == ASSET
+    assert output_file.read_bytes() == DATA
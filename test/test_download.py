@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmark"))
+
+from server import ReleaseServer  # noqa: E402
+from setup_everything.download import (  # noqa: E402
+    ArtifactStore,
+    Downloader,
+    HttpClient,
+    ChecksumMismatchError,
+    DigestMismatchError,
+    ManifestError,
+    ReleaseIndex,
+)
+from setup_everything.download import download  # noqa: E402
+from setup_everything.download.retry import RetryPolicy  # noqa: E402
+from setup_everything.prefetch.prefetch import Prefetcher, PrefetchTarget  # noqa: E402
+
+RELEASE = "v1.0.0"
+ASSET = "tool"
+DATA = os.urandom(300 * 1024)
+SHA256 = hashlib.sha256(DATA).hexdigest()
+
+
+@pytest.fixture(scope="module")
+def release_root(tmp_path_factory):
+    root = tmp_path_factory.mktemp("releases")
+    (root / RELEASE).mkdir()
+    (root / RELEASE / ASSET).write_bytes(DATA)
+    return root
+
+
+@pytest.fixture(scope="module", params=[False, True], ids=["range", "no-range"])
+def server(request, release_root):
+    server = ReleaseServer(release_root, ignore_ranges=request.param).start()
+    server.ignore_ranges = request.param
+    yield server
+    server.stop()
+
+
+def get_downloader(segments: int = 1) -> Downloader:
+    return Downloader(
+        http_client=HttpClient(retry_policy=RetryPolicy(max_attempts=1)),
+        segments=segments,
+    )
+
+
+def get_url(server: ReleaseServer) -> str:
+    return f"{server.url}/assets/{RELEASE}/{ASSET}"
+
+
+def test_download_stream_complete_part(server, tmp_path):
+    part_file = tmp_path / f"{ASSET}.part"
+    part_file.write_bytes(DATA)
+
+    downloader = get_downloader()
+    sha256 = downloader.download_stream(get_url(server), {}, str(part_file))
+
+    assert sha256 == SHA256
+    assert part_file.read_bytes() == DATA
+
+
+def test_download_stream_resume(server, tmp_path):
+    part_file = tmp_path / f"{ASSET}.part"
+    part_file.write_bytes(DATA[:100000])
+
+    downloader = get_downloader()
+    sha256 = downloader.download_stream(get_url(server), {}, str(part_file))
+
+    assert sha256 == SHA256
+    assert part_file.read_bytes() == DATA
+
+    downloaded = downloader.metrics.counters["downloaded_bytes"]
+    assert downloaded == (len(DATA) if server.ignore_ranges else len(DATA) - 100000)
+
+
+def test_download_asset_complete_part(server, tmp_path):
+    output_file = tmp_path / ASSET
+    (tmp_path / f"{ASSET}.part").write_bytes(DATA)
+
+    assert get_downloader().download_asset(get_url(server), str(output_file), SHA256)
+    assert output_file.read_bytes() == DATA
+    assert not (tmp_path / f"{ASSET}.part").exists()
+
+
+def test_download_asset_resume_mismatch(server, tmp_path):
+    output_file = tmp_path / ASSET
+    (tmp_path / f"{ASSET}.part").write_bytes(b"x" * 100000)
+
+    assert get_downloader().download_asset(get_url(server), str(output_file), SHA256)
+    assert output_file.read_bytes() == DATA
+
+
+@pytest.mark.parametrize("segments", [1, 4])
+def test_download_segments(server, tmp_path, monkeypatch, segments):
+    monkeypatch.setattr(download, "MIN_SEGMENT_SIZE", 1024)
+    output_file = tmp_path / ASSET
+
+    downloader = get_downloader(segments)
+    assert downloader.download_asset(get_url(server), str(output_file), SHA256)
+    assert output_file.read_bytes() == DATA
+
+    downloaded = downloader.metrics.counters["downloaded_bytes"]
+    assert downloaded == len(DATA)
+
+
+def test_fetch_manifest_asset_errors(server, tmp_path):
+    manifest = {
+        "repo": "owner/tool",
+        "assets": {"Linux": {"X64": ASSET}},
+        "release_pattern": RELEASE,
+    }
+    downloader = Downloader(
+        http_client=HttpClient(retry_policy=RetryPolicy(max_attempts=1)),
+        mirror_url=server.url,
+    )
+    output_file = str(tmp_path / ASSET)
+
+    with pytest.raises(ChecksumMismatchError):
+        downloader.fetch_manifest_asset(
+            manifest, "X64", "Linux", "1.0.0", output_file, "0" * 64
+        )
+
+    with pytest.raises(ManifestError):
+        downloader.fetch_manifest_asset(
+            manifest, "ARM64", "Linux", "1.0.0", output_file, SHA256
+        )
+
+    with pytest.raises(SystemExit):
+        downloader.download_manifest_asset(
+            manifest, "X64", "Linux", "1.0.0", output_file, "0" * 64
+        )
+
+    assert not os.path.exists(output_file)
+    assert (
+        downloader.fetch_manifest_asset(
+            manifest, "X64", "Linux", "1.0.0", output_file, SHA256
+        )
+        == ASSET
+    )
+
+
+def test_prefetch_reports_failed_targets(server, tmp_path, monkeypatch):
+    manifest_dir = tmp_path / "manifests"
+    (manifest_dir / "tool").mkdir(parents=True)
+    (manifest_dir / "tool" / "manifest.json").write_text(
+        json.dumps(
+            {
+                "repo": "owner/tool",
+                "assets": {"Linux": {"X64": ASSET, "ARM64": ASSET}},
+                "release_pattern": RELEASE,
+            }
+        )
+    )
+    monkeypatch.setenv("SETUP_EVERYTHING_MIRROR", server.url)
+    monkeypatch.setenv("SETUP_EVERYTHING_RETRIES", "1")
+
+    store = ArtifactStore(tmp_path / "cache")
+    prefetcher = Prefetcher(str(manifest_dir), artifact_store=store)
+    targets = [
+        PrefetchTarget("tool", "1.0.0", "Linux", "X64", SHA256),
+        PrefetchTarget("tool", "1.0.0", "Linux", "ARM64", "0" * 64),
+    ]
+
+    assert not prefetcher.prefetch(targets)
+    assert store.contains(SHA256)
+    assert not store.contains("0" * 64)
+
+
+@pytest.mark.parametrize("digest", [SHA256, "0" * 64], ids=["match", "mismatch"])
+def test_fetch_indexed_asset(server, tmp_path, monkeypatch, digest):
+    monkeypatch.setattr(Downloader, "GITHUB_API_URL", f"{server.url}/api")
+    release_index = ReleaseIndex(tmp_path / "cache")
+    asset = {"url": get_url(server), "size": len(DATA), "digest": f"sha256:{digest}"}
+    release_index.store("owner/tool", {RELEASE: {ASSET: asset}})
+
+    downloader = Downloader(
+        direct_download=False,
+        http_client=HttpClient(retry_policy=RetryPolicy(max_attempts=1)),
+        release_index=release_index,
+    )
+    manifest = {"repo": "owner/tool", "assets": {"Linux": {"X64": ASSET}}}
+    output_file = tmp_path / ASSET
+
+    if digest != SHA256:
+        with pytest.raises(DigestMismatchError):
+            downloader.fetch_manifest_asset(
+                manifest, "X64", "Linux", "1.0.0", str(output_file), SHA256
+            )
+        return
+
+    downloader.fetch_manifest_asset(
+        manifest, "X64", "Linux", "1.0.0", str(output_file), SHA256
+    )
+    assert output_file.read_bytes() == DATA
@@ -0,0 +1,59 @@
+import io
+import sys
+import tarfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from setup_everything.install import Installer  # noqa: E402
+
+TOOL = b"#!/bin/sh\necho tool\n"
+
+
+def add_file(tar: tarfile.TarFile, name: str, data: bytes) -> None:
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mode = 0o755
+    tar.addfile(info, io.BytesIO(data))
+
+
+def add_link(tar: tarfile.TarFile, name: str, target: str, kind: bytes) -> None:
+    info = tarfile.TarInfo(name)
+    info.type = kind
+    info.linkname = target
+    tar.addfile(info)
+
+
+@pytest.mark.parametrize("external", [False, True], ids=["tarfile", "external"])
+def test_install_link_members(tmp_path, external):
+    archive = tmp_path / "tool.tar.xz"
+    with tarfile.open(archive, "w:xz") as tar:
+        add_link(tar, "./tool/bin/tool", "../libexec/tool-1.0", tarfile.SYMTYPE)
+        add_file(tar, "./tool/libexec/tool-1.0", TOOL)
+        add_link(
+            tar, "./tool/bin/tool-hardlink", "./tool/libexec/tool-1.0", tarfile.LNKTYPE
+        )
+        add_link(tar, "./tool/bin/alias", "tool", tarfile.SYMTYPE)
+
+    installer = Installer(external_decompressors=external)
+    manifest = {"name": "tool", "extract_patterns": ["tool", "tool-hardlink", "alias"]}
+    installer.install_asset(archive, archive.name, tmp_path / "bin", manifest)
+
+    for name in ["tool", "tool-hardlink", "alias"]:
+        path = tmp_path / "bin" / name
+        assert not path.is_symlink()
+        assert path.read_bytes() == TOOL
+
+    assert not (tmp_path / "bin" / "tool-1.0").exists()
+
+
+def test_install_link_outside_archive(tmp_path):
+    archive = tmp_path / "tool.tar.xz"
+    with tarfile.open(archive, "w:xz") as tar:
+        add_link(tar, "tool", "/usr/bin/env", tarfile.SYMTYPE)
+
+    manifest = {"name": "tool", "extract_patterns": ["tool"]}
+    with pytest.raises(SystemExit):
+        Installer().install_asset(archive, archive.name, tmp_path / "bin", manifest)
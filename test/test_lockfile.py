@@ -0,0 +1,44 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from setup_everything.lock import Lockfile  # noqa: E402
+
+SHA256 = "a" * 64
+
+
+@pytest.mark.parametrize(
+    "tools",
+    [
+        [],
+        {"hugo": "1.0"},
+        {"hugo": {"version": 1, "checksums": {}}},
+        {"hugo": {"version": "1.0", "checksums": []}},
+        {"hugo": {"version": "1.0", "checksums": {"Linux": SHA256}}},
+        {"hugo": {"version": "1.0", "checksums": {"Linux": {"X64": 1}}}},
+        {"hugo": {"version": "1.0", "checksums": {"Linux": {"X64": "abc"}}}},
+    ],
+)
+def test_load_invalid_lockfile(tmp_path, capsys, tools):
+    path = tmp_path / "setup-everything.lock"
+    path.write_text(json.dumps({"version": 1, "tools": tools}))
+
+    with pytest.raises(SystemExit):
+        Lockfile.load(path)
+
+    assert str(path) in capsys.readouterr().out
+
+
+def test_load_lockfile(tmp_path):
+    path = tmp_path / "setup-everything.lock"
+    lockfile = Lockfile(path)
+    lockfile.set_checksum("hugo", "1.0", "Linux", "X64", SHA256)
+    lockfile.save()
+
+    entry = Lockfile.load(path).get_entry("hugo", "Linux", "X64")
+
+    assert entry == {"tool": "hugo", "version": "1.0", "sha256": SHA256}
@@ -0,0 +1,43 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from setup_everything.download import Downloader  # noqa: E402
+from setup_everything.lock import Lockfile, Resolver  # noqa: E402
+from setup_everything.prefetch.prefetch import Prefetcher  # noqa: E402
+
+MANIFEST_DIR = Path(__file__).resolve().parents[1] / "manifests"
+
+
+def load_manifests():
+    return {
+        path.parent.name: json.loads(path.read_text())
+        for path in sorted(MANIFEST_DIR.glob("*/manifest.json"))
+    }
+
+
+def test_prefetch_targets():
+    expected = {
+        (tool, manifest["test"]["version"], os_name, arch, sha256)
+        for tool, manifest in load_manifests().items()
+        if "test" in manifest
+        for os_name, checksums in manifest["test"]["checksums"].items()
+        for arch, sha256 in checksums.items()
+    }
+
+    targets = Prefetcher(str(MANIFEST_DIR)).get_manifest_targets(None)
+
+    assert expected
+    assert set(targets) == expected
+
+
+def test_resolver_default_version(tmp_path):
+    resolver = Resolver(str(MANIFEST_DIR), Downloader())
+    lockfile = Lockfile(tmp_path / "setup-everything.lock")
+
+    for tool, manifest in load_manifests().items():
+        if "test" in manifest:
+            version = resolver.get_default_version(tool, lockfile)
+            assert version == manifest["test"]["version"]
@@ -0,0 +1,73 @@
+import json
+import sys
+import tarfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from setup_everything.install.install import install_from_env  # noqa: E402
+from setup_everything.utils.metrics import Metrics  # noqa: E402
+
+
+def test_merge_metrics():
+    metrics = Metrics({"tool": "hugo"})
+    metrics.add_time("transfer", 1.0)
+    metrics.add_time("extract", 0.5)
+    metrics.count("installed_bytes", 50)
+    metrics.merge(
+        {
+            "tool": "hugo",
+            "version": "1.0",
+            "seconds": 5.0,
+            "phases": {"transfer": 2.0},
+            "counters": {"downloaded_bytes": 100},
+        }
+    )
+    summary = metrics.to_dict()
+
+    assert summary["tool"] == "hugo"
+    assert summary["version"] == "1.0"
+    assert 5.0 <= summary["seconds"] < 10.0
+    assert summary["phases"] == {"extract": 0.5, "transfer": 3.0}
+    assert summary["counters"] == {"downloaded_bytes": 100, "installed_bytes": 50}
+
+
+def test_install_emits_download_metrics(tmp_path, monkeypatch):
+    tool = tmp_path / "tool"
+    tool.write_bytes(b"#!/bin/sh\n")
+    archive = tmp_path / "tool.tar.gz"
+    with tarfile.open(archive, "w:gz") as tar:
+        tar.add(tool, "tool")
+
+    manifest = tmp_path / "manifests" / "tool" / "manifest.json"
+    manifest.parent.mkdir(parents=True)
+    manifest.write_text(
+        json.dumps(
+            {
+                "name": "tool",
+                "repo": "owner/tool",
+                "assets": {},
+                "extract_patterns": ["tool"],
+            }
+        )
+    )
+
+    download = Metrics({"tool": "tool", "version": "1.0"})
+    download.count("downloaded_bytes", 100)
+    output = tmp_path / "output"
+    monkeypatch.setenv("FILE", str(archive))
+    monkeypatch.setenv("NAME", archive.name)
+    monkeypatch.setenv("INSTALL_DIR", str(tmp_path / "bin"))
+    monkeypatch.setenv("METRICS", json.dumps(download.to_dict()))
+    monkeypatch.setenv("GITHUB_OUTPUT", str(output))
+    monkeypatch.delenv("GITHUB_PATH", raising=False)
+    monkeypatch.delenv("SHA256", raising=False)
+
+    install_from_env(str(manifest))
+
+    name, value = output.read_text().splitlines()[-1].split("=", 1)
+    summary = json.loads(value)
+    assert name == "metrics"
+    assert summary["version"] == "1.0"
+    assert summary["counters"]["downloaded_bytes"] == 100
+    assert summary["counters"]["installed_bytes"] > 0
@@ -0,0 +1,45 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from setup_everything.mirror.mirror import Mirror  # noqa: E402
+
+
+def test_locks_are_released(tmp_path):
+    mirror = Mirror(tmp_path)
+    entered = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def hold(name):
+        with mirror.hold_lock("asset:tool"):
+            order.append(name)
+            entered.set()
+            release.wait(5)
+
+    first = threading.Thread(target=hold, args=("first",))
+    first.start()
+    entered.wait(5)
+    second = threading.Thread(target=hold, args=("second",))
+    second.start()
+
+    while mirror.lock_holders.get("asset:tool") != 2:
+        time.sleep(0.01)
+
+    assert order == ["first"]
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert order == ["first", "second"]
+    assert mirror.locks == {}
+    assert mirror.lock_holders == {}
+
+    for index in range(100):
+        with mirror.hold_lock(f"release:owner/tool@v{index}"):
+            pass
+
+    assert mirror.locks == {}
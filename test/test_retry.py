@@ -0,0 +1,83 @@
+import socket
+import sys
+import time
+from email.utils import formatdate
+from http.client import HTTPMessage
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from setup_everything.download import HttpClient  # noqa: E402
+from setup_everything.download.retry import RetryPolicy  # noqa: E402
+
+
+def get_error(code: int, headers=None) -> HTTPError:
+    message = HTTPMessage()
+    for name, value in (headers or {}).items():
+        message[name] = value
+
+    return HTTPError("https://example.invalid", code, "error", message, None)
+
+
+def test_backoff_is_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+
+    assert all(0 <= policy.get_backoff(0) <= 1.0 for _ in range(100))
+    assert all(0 <= policy.get_backoff(10) <= 5.0 for _ in range(100))
+
+
+def test_retry_after_seconds():
+    delay = RetryPolicy().get_delay(0, get_error(429, {"Retry-After": "7"}))
+
+    assert delay == 7.0
+
+
+def test_retry_after_date():
+    retry_after = formatdate(time.time() + 30, usegmt=True)
+    delay = RetryPolicy().get_delay(0, get_error(503, {"Retry-After": retry_after}))
+
+    assert delay == pytest.approx(30, abs=2)
+
+
+def test_rate_limit_reset():
+    headers = {
+        "X-RateLimit-Remaining": "0",
+        "X-RateLimit-Reset": str(int(time.time()) + 20),
+    }
+    delay = RetryPolicy().get_delay(0, get_error(403, headers))
+
+    assert delay == pytest.approx(21, abs=2)
+
+
+def test_forbidden_without_rate_limit():
+    assert RetryPolicy().get_delay(0, get_error(403)) is None
+    assert RetryPolicy().get_delay(0, get_error(404)) is None
+
+
+def test_delay_over_budget():
+    retry = RetryPolicy(budget=5.0).begin("Request")
+
+    assert retry.next_delay(get_error(429, {"Retry-After": "10"})) is None
+    assert retry.attempt == 1
+    assert retry.waited == 0.0
+
+
+def test_request_shares_retry_state():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        url = f"http://127.0.0.1:{sock.getsockname()[1]}/asset"
+
+    policy = RetryPolicy(max_attempts=3, base_delay=0.0)
+    client = HttpClient(timeout=1, retry_policy=policy)
+    retry = policy.begin("Download")
+
+    with pytest.raises(URLError):
+        client.request(url, retry=retry)
+    assert retry.attempt == 3
+
+    with pytest.raises(URLError):
+        client.request(url, retry=retry)
+    assert retry.attempt == 3